@@ -0,0 +1,188 @@
+"""Time every operation on synthetic workbooks and save the results as JSON.
+
+Workbooks are generated with make_workbooks.py (or reused with --data), then
+each operation runs alone through the headless command line in a fresh
+process, so wall time includes loading and peak RSS is that operation's own.
+Results can be compared with an earlier run:
+
+    python benchmarks/bench_operations.py --rows 50000 --columns 30 -o before.json
+    python benchmarks/bench_operations.py --rows 50000 --columns 30 -o after.json --compare before.json
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import make_workbooks
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CLI = os.path.join(ROOT, "lazy_excel_cli.py")
+DEFAULT_OPERATIONS = ("merge", "clean", "format_adjust", "rename_columns", "generate_summary",
+                      "smart_cross_table_merge", "data_analysis_report")
+# 基准测试不使用用户环境中的暂存目录、增量清单等设置，保证每次都是完整运行；
+# 也不写运行日志、不开启 cProfile/tracemalloc，以免影响计时
+CLEARED_ENV = ("LAZY_EXCEL_STAGING_DIR", "LAZY_EXCEL_MANIFEST", "LAZY_EXCEL_RUN_LOG", "LAZY_EXCEL_PROFILE")
+
+
+def _run_child(command, env):
+    """Run command and return (wall seconds, peak RSS in bytes or None)."""
+    # stderr 写入临时文件而不是管道，避免输出过多时子进程阻塞
+    with tempfile.TemporaryFile() as stderr:
+        started = time.perf_counter()
+        process = subprocess.Popen(command, env=env, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=stderr)
+        if hasattr(os, "wait4"):
+            # wait4 返回该子进程自己的资源统计；Linux 的 ru_maxrss 单位是 KB，macOS 是字节
+            _, status, usage = os.wait4(process.pid, 0)
+            elapsed = time.perf_counter() - started
+            process.returncode = os.waitstatus_to_exitcode(status)
+            peak = usage.ru_maxrss if sys.platform == "darwin" else usage.ru_maxrss * 1024
+        else:
+            peak = _poll_peak_rss(process)
+            process.wait()
+            elapsed = time.perf_counter() - started
+        if process.returncode != 0:
+            stderr.seek(0)
+            raise RuntimeError(f"{' '.join(command)} failed:\n{stderr.read().decode(errors='replace')}")
+    return elapsed, peak
+
+
+def _poll_peak_rss(process, interval=0.05):
+    """Peak RSS of process where wait4 is missing (Windows); needs psutil, else None."""
+    try:
+        import psutil
+    except ImportError:
+        return None
+    peak = 0
+    try:
+        watched = psutil.Process(process.pid)
+        while process.poll() is None:
+            info = watched.memory_info()
+            peak = max(peak, getattr(info, "peak_wset", 0) or info.rss)
+            time.sleep(interval)
+    except psutil.NoSuchProcess:
+        pass
+    return peak or None
+
+
+def operation_command(operation, files, output_dir, all_sheets=False):
+    command = [sys.executable, CLI, *files, "--ops", operation, "--output-dir", output_dir, "--quiet"]
+    if all_sheets:
+        command += ["--sheet", "all"]
+    if operation == "rename_columns":
+        command += ["--rename", f"{make_workbooks.KEY_COLUMN}:Key"]
+    if operation == "smart_cross_table_merge":
+        command += ["--key", make_workbooks.KEY_COLUMN]
+    return command
+
+
+def bench_operation(operation, files, runs, env, all_sheets=False):
+    timings = []
+    peaks = []
+    for _ in range(runs):
+        output_dir = tempfile.mkdtemp(prefix="lazy-excel-bench-")
+        try:
+            elapsed, peak = _run_child(operation_command(operation, files, output_dir, all_sheets), env)
+        finally:
+            shutil.rmtree(output_dir, ignore_errors=True)
+        timings.append(elapsed)
+        if peak is not None:
+            peaks.append(peak)
+    return timings, max(peaks) if peaks else None
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path):
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = {entry["operation"]: entry for entry in json.load(f)["results"]}
+    print(f"\nCompared with {baseline_path}:")
+    for entry in results:
+        old = baseline.get(entry["operation"])
+        if old is None:
+            continue
+        line = f"  {entry['operation']:<26} time x{entry['median_s'] / old['median_s']:.2f}"
+        if entry["peak_rss_mb"] and old["peak_rss_mb"]:
+            line += f"   peak RSS x{entry['peak_rss_mb'] / old['peak_rss_mb']:.2f}"
+        print(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ops", default=",".join(DEFAULT_OPERATIONS), help="comma-separated operations to time")
+    parser.add_argument("--data", default=None,
+                        help="directory of existing .xlsx inputs; default: generate them into a temp dir")
+    make_workbooks.add_arguments(parser)
+    parser.add_argument("--all-sheets", action="store_true", help="read every sheet instead of only the first")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("-o", "--output", default="bench_results.json", help="JSON results file")
+    parser.add_argument("--compare", default=None, help="earlier results file to compare against")
+    args = parser.parse_args(argv)
+
+    operations = [name.strip() for name in args.ops.split(",") if name.strip()]
+    data_dir = args.data or tempfile.mkdtemp(prefix="lazy-excel-data-")
+    try:
+        if args.data:
+            files = sorted(os.path.join(data_dir, name) for name in os.listdir(data_dir)
+                           if name.lower().endswith(".xlsx"))
+        else:
+            print(f"Generating {args.files} workbooks of {args.sheets} x {args.rows} rows x {args.columns} columns...")
+            files = make_workbooks.generate(data_dir, args.files, args.rows, args.columns, args.sheets,
+                                            args.null_density, args.key_overlap, args.seed)
+        input_bytes = sum(os.path.getsize(path) for path in files)
+        # 命令行默认只读取第一个工作表
+        input_rows = args.rows * len(files) * (args.sheets if args.all_sheets else 1) if not args.data else None
+
+        env = {name: value for name, value in os.environ.items() if name not in CLEARED_ENV}
+        results = []
+        for operation in operations:
+            timings, peak = bench_operation(operation, files, args.runs, env, args.all_sheets)
+            median = statistics.median(timings)
+            entry = {
+                "operation": operation,
+                "runs_s": timings,
+                "median_s": median,
+                "min_s": min(timings),
+                "peak_rss_mb": peak / (1024 * 1024) if peak else None,
+                "rows_per_s": input_rows / median if input_rows else None,
+                "mb_per_s": input_bytes / median / (1024 * 1024),
+            }
+            results.append(entry)
+            rss = f"{entry['peak_rss_mb']:.0f} MB" if entry["peak_rss_mb"] else "n/a"
+            print(f"{operation:<28} median {median:.2f}s  min {min(timings):.2f}s  peak RSS {rss}  "
+                  f"{entry['mb_per_s']:.2f} MB/s")
+    finally:
+        if not args.data:
+            shutil.rmtree(data_dir, ignore_errors=True)
+
+    report = {
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {"files": len(files), "rows": args.rows, "columns": args.columns, "sheets": args.sheets,
+                   "null_density": args.null_density, "key_overlap": args.key_overlap, "seed": args.seed,
+                   "all_sheets": args.all_sheets, "data": args.data, "input_bytes": input_bytes, "runs": args.runs},
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
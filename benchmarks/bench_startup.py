@@ -0,0 +1,45 @@
+"""Measure how long the GUI takes from launch until its window is shown.
+
+Each target is started with LAZY_EXCEL_EXIT_AFTER_START=1, which makes the
+window close itself as soon as the Tk loop is idle, so the process wall time
+is the startup time. Targets can be the .py scripts or built executables:
+
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py dist/lazy_excel_gui_full/lazy_excel_gui_full.exe --runs 5
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_TARGETS = [os.path.join(ROOT, "lazy_excel_gui_free.py"), os.path.join(ROOT, "lazy_excel_gui_full.py")]
+
+
+def time_startup(target, runs):
+    command = [sys.executable, target] if target.endswith(".py") else [target]
+    env = dict(os.environ, LAZY_EXCEL_EXIT_AFTER_START="1")
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run(command, env=env, cwd=ROOT, check=True)
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("targets", nargs="*", default=DEFAULT_TARGETS, help="GUI scripts or executables")
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    for target in args.targets:
+        timings = time_startup(target, args.runs)
+        print(f"{os.path.basename(target)}: median {statistics.median(timings):.3f}s, "
+              f"min {min(timings):.3f}s over {args.runs} runs")
+
+
+if __name__ == "__main__":
+    main()
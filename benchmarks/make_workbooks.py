@@ -0,0 +1,105 @@
+"""Generate synthetic .xlsx workbooks for the operation benchmarks.
+
+Every workbook has an OrderID key column followed by a repeating mix of
+integer, float, low-cardinality text, free text and date columns. A share of
+cells is left empty, and a share of the keys is common to all files so the
+cross-table join has matches:
+
+    python benchmarks/make_workbooks.py bench-data --files 4 --rows 50000 --columns 30
+    python benchmarks/make_workbooks.py bench-data --sheets 3 --null-density 0.2 --key-overlap 0.5
+"""
+import argparse
+import datetime
+import os
+
+import numpy as np
+import xlsxwriter
+
+KEY_COLUMN = "OrderID"
+REGIONS = ["North", "South", "East", "West", "Central"]
+STATUSES = ["open", "shipped", "returned", "cancelled"]
+COLUMN_KINDS = ("int", "float", "category", "text", "date")
+
+
+def _column_values(kind, rows, rng):
+    if kind == "int":
+        return rng.integers(0, 100000, rows).tolist()
+    if kind == "float":
+        return np.round(rng.normal(1000, 250, rows), 2).tolist()
+    if kind == "category":
+        return rng.choice(REGIONS + STATUSES, rows).tolist()
+    if kind == "text":
+        return [f"item-{value:08x}" for value in rng.integers(0, 2 ** 32, rows)]
+    start = datetime.datetime(2020, 1, 1)
+    return [start + datetime.timedelta(minutes=int(m)) for m in rng.integers(0, 60 * 24 * 365 * 3, rows)]
+
+
+def _keys(file_index, rows, key_overlap, rng):
+    """Keys for one file: key_overlap of them from a pool shared by all files, the rest unique to it."""
+    shared = int(rows * key_overlap)
+    keys = np.concatenate([np.arange(shared), (file_index + 1) * 10 ** 9 + np.arange(rows - shared)])
+    rng.shuffle(keys)
+    return keys.tolist()
+
+
+def write_workbook(path, rows, columns, sheets=1, null_density=0.1, key_overlap=0.5, file_index=0, seed=0):
+    """Write one workbook with sheets sheets of rows x columns cells (OrderID included)."""
+    rng = np.random.default_rng(seed + file_index)
+    kinds = [COLUMN_KINDS[i % len(COLUMN_KINDS)] for i in range(columns - 1)]
+    header = [KEY_COLUMN] + [f"{kind}_{i + 1}" for i, kind in enumerate(kinds)]
+    workbook = xlsxwriter.Workbook(path, {"constant_memory": True})
+    date_format = workbook.add_format({"num_format": "yyyy-mm-dd hh:mm:ss"})
+    try:
+        for sheet in range(sheets):
+            worksheet = workbook.add_worksheet(f"Sheet{sheet + 1}")
+            worksheet.write_row(0, 0, header)
+            data = [_keys(file_index, rows, key_overlap, rng)] + [_column_values(kind, rows, rng) for kind in kinds]
+            # 键列不留空，其余列按 null_density 随机留空
+            empty = rng.random((rows, columns)) < null_density
+            empty[:, 0] = False
+            for row_num in range(rows):
+                for col_num in range(columns):
+                    if empty[row_num, col_num]:
+                        continue
+                    value = data[col_num][row_num]
+                    if isinstance(value, datetime.datetime):
+                        worksheet.write_datetime(row_num + 1, col_num, value, date_format)
+                    else:
+                        worksheet.write(row_num + 1, col_num, value)
+    finally:
+        workbook.close()
+
+
+def generate(directory, files=4, rows=10000, columns=20, sheets=1, null_density=0.1, key_overlap=0.5, seed=0):
+    """Write files workbooks into directory and return their paths."""
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for file_index in range(files):
+        path = os.path.join(directory, f"synthetic_{file_index + 1:03d}.xlsx")
+        write_workbook(path, rows, columns, sheets, null_density, key_overlap, file_index, seed)
+        paths.append(path)
+    return paths
+
+
+def add_arguments(parser):
+    parser.add_argument("--files", type=int, default=4)
+    parser.add_argument("--rows", type=int, default=10000, help="data rows per sheet")
+    parser.add_argument("--columns", type=int, default=20, help="columns per sheet, OrderID included")
+    parser.add_argument("--sheets", type=int, default=1)
+    parser.add_argument("--null-density", type=float, default=0.1, help="share of empty cells outside OrderID")
+    parser.add_argument("--key-overlap", type=float, default=0.5, help="share of OrderIDs present in every file")
+    parser.add_argument("--seed", type=int, default=0)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("directory")
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+    for path in generate(args.directory, args.files, args.rows, args.columns, args.sheets,
+                         args.null_density, args.key_overlap, args.seed):
+        print(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+import argparse
+import glob
+import multiprocessing
+import os
+import sys
+
+from lazy_excel_common import FILE_OPERATIONS, OPERATIONS, SINGLE_OUTPUT_OPERATIONS, Progress, parse_column_mapping
+from lazy_excel_engine import run_operations
+from lazy_excel_io import DEFAULT_STAGING_DIR, SheetSelection
+from lazy_excel_manifest import DEFAULT_MANIFEST_PATH, MANIFEST_NAME
+from lazy_excel_runlog import DEFAULT_PROFILE, DEFAULT_RUN_LOG, RUN_LOG_NAME
+
+
+def expand_inputs(patterns):
+    """Expand glob patterns into a sorted list of unique Excel files."""
+    files = set()
+    for pattern in patterns:
+        for path in glob.glob(pattern, recursive=True):
+            if os.path.isfile(path) and path.lower().endswith((".xlsx", ".xls")):
+                files.add(os.path.abspath(path))
+    return sorted(files)
+
+
+def parse_sheet(text):
+    """Sheet selector: a 0-based index, a sheet name, or 'all' for every sheet."""
+    if text.lower() in ("all", "*"):
+        return None
+    return int(text) if text.isdigit() else text
+
+
+def parse_row_range(text):
+    """Row range 'START:STOP' of data rows, 0-based and STOP exclusive; either end may be empty."""
+    start, sep, stop = text.partition(":")
+    if not sep:
+        raise argparse.ArgumentTypeError("expected START:STOP, e.g. 0:1000")
+    try:
+        rows = (int(start) if start else None, int(stop) if stop else None)
+    except ValueError:
+        raise argparse.ArgumentTypeError("START and STOP must be integers")
+    if any(bound is not None and bound < 0 for bound in rows):
+        raise argparse.ArgumentTypeError("START and STOP must not be negative")
+    return rows
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="lazy-excel",
+        description="Run Lazy Excel Toolbox operations without a display.")
+    parser.add_argument("inputs", nargs="+", help="input files or glob patterns, e.g. 'data/**/*.xlsx'")
+    parser.add_argument("-o", "--ops", required=True,
+                        help="comma-separated operations: " + ", ".join(OPERATIONS))
+    parser.add_argument("-d", "--output-dir", required=True, help="directory for all output files")
+    parser.add_argument("--rename", default="", help="column mapping for rename_columns, e.g. 'Old1:New1,Old2:New2'")
+    parser.add_argument("--logo", default="logo.png", help="image used by template_export_with_logo")
+    parser.add_argument("--key", default=None,
+                        help="join column for smart_cross_table_merge (default: auto-detect a column shared by all "
+                             "files); if a key repeats within one file only its first row is joined")
+    parser.add_argument("--sheet", type=parse_sheet, default=0,
+                        help="sheet to read: 0-based index, name, or 'all' to stack every sheet (default: first)")
+    parser.add_argument("--usecols", default=None,
+                        help="comma-separated columns to read; the others are never parsed into frames")
+    parser.add_argument("--rows", type=parse_row_range, default=None,
+                        help="range of data rows to read, 0-based and non-negative, e.g. 0:1000 or 5000:")
+    parser.add_argument("--no-compact", dest="compact", action="store_false",
+                        help="keep pandas' default dtypes instead of downcasting loaded workbooks")
+    parser.add_argument("--workers", type=int, default=None, help="processes used to parse workbooks")
+    parser.add_argument("--staging-dir", default=DEFAULT_STAGING_DIR,
+                        help="keep parsed workbooks as Parquet here and reuse them on later runs (needs pyarrow)")
+    parser.add_argument("--incremental", action="store_true",
+                        help=f"skip inputs unchanged since the last run, tracked in OUTPUT_DIR/{MANIFEST_NAME}")
+    parser.add_argument("--manifest", default=DEFAULT_MANIFEST_PATH,
+                        help="manifest file for incremental runs (implies --incremental)")
+    parser.add_argument("--width-sample-rows", type=int, default=None,
+                        help="estimate column widths from this many sampled rows on large sheets")
+    parser.add_argument("--run-log", default=DEFAULT_RUN_LOG,
+                        help="append per-stage and per-file timings of this run to a JSONL file")
+    parser.add_argument("--profile", action="store_true", default=DEFAULT_PROFILE,
+                        help=f"also record cProfile and tracemalloc data (log: OUTPUT_DIR/{RUN_LOG_NAME} "
+                             "unless --run-log is given)")
+    parser.add_argument("-q", "--quiet", action="store_true", help="do not print per-file progress")
+    return parser
+
+
+def progress_printer():
+    """Return a Progress callback that prints one line whenever the stage or file changes."""
+    last = [None]
+
+    def show(snapshot):
+        current = (snapshot["stage"], snapshot["file"])
+        if current != last[0]:
+            last[0] = current
+            print(f"[{snapshot['fraction']:4.0%}] {snapshot['stage']} {snapshot['file']}", file=sys.stderr)
+
+    return show
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    operations = [name.strip() for name in args.ops.split(",") if name.strip()]
+    unknown = [name for name in operations if name not in OPERATIONS]
+    if unknown:
+        parser.error(f"unknown operations: {', '.join(unknown)}")
+    if "rename_columns" in operations and not args.rename:
+        parser.error("rename_columns needs --rename")
+
+    files = expand_inputs(args.inputs)
+    if not files:
+        parser.error("no Excel files matched the given inputs")
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    save_paths = {name: os.path.join(args.output_dir, f"{name}.xlsx")
+                  for name in SINGLE_OUTPUT_OPERATIONS if name in operations}
+    column_mapping = parse_column_mapping(args.rename) if args.rename else None
+    usecols = [name.strip() for name in args.usecols.split(",") if name.strip()] if args.usecols else None
+    selection = SheetSelection(args.sheet, usecols, args.rows)
+    manifest_path = args.manifest
+    if args.incremental and not manifest_path:
+        manifest_path = os.path.join(args.output_dir, MANIFEST_NAME)
+    run_log_path = args.run_log
+    if args.profile and not run_log_path:
+        run_log_path = os.path.join(args.output_dir, RUN_LOG_NAME)
+
+    total_stages = len([name for name in operations if name in FILE_OPERATIONS])
+    progress = Progress(len(files), total_stages, callback=None if args.quiet else progress_printer())
+    try:
+        run_operations(files, operations, output_dir=args.output_dir, save_paths=save_paths,
+                       column_mapping=column_mapping, logo_path=args.logo, key=args.key,
+                       workers=args.workers, width_sample_rows=args.width_sample_rows,
+                       staging_dir=args.staging_dir, manifest_path=manifest_path, selection=selection,
+                       compact=args.compact, run_log_path=run_log_path, profile=args.profile, progress=progress)
+    except ValueError as e:
+        # 输入无法处理 (文件都读不出、连接键不存在、超出工作表大小等) 时给出错误信息而不是堆栈
+        parser.exit(1, f"{parser.prog}: error: {e}\n")
+
+    snapshot = progress.snapshot()
+    print(f"Processed {len(files)} files in {snapshot['elapsed']:.1f}s "
+          f"({snapshot['rows_per_s']:,.0f} rows/s, {snapshot['mb_per_s']:.2f} MB/s)")
+    return 0
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
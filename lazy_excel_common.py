@@ -0,0 +1,154 @@
+# 轻量的公共定义，只依赖标准库，界面启动时导入不会加载 pandas
+import contextlib
+import os
+import sys
+import time
+
+
+class CancelledError(BaseException):
+    """Raised between chunks when the user cancels a run.
+
+    Like asyncio.CancelledError it derives from BaseException, so the
+    per-feature "except Exception" handlers do not swallow a cancel.
+    """
+
+
+class Progress:
+    """Per-file, per-stage progress of a run, with throughput and ETA.
+
+    Stages call start_file/advance/finish_file; every update is passed to
+    callback as a snapshot dict. Setting cancel_event makes the next update
+    raise CancelledError, so work stops cleanly between chunks. With a
+    run_log (lazy_excel_runlog.RunLog) the same boundaries, plus the steps
+    wrapped in phase(), are recorded for the run log. on_file_done(path) is
+    called after every finished file, e.g. to charge a usage quota.
+    """
+
+    def __init__(self, total_files, total_stages=1, callback=None, cancel_event=None, run_log=None,
+                 on_file_done=None):
+        self.total_units = max(total_files * total_stages, 1)
+        self.callback = callback
+        self.cancel_event = cancel_event
+        self.run_log = run_log
+        self.on_file_done = on_file_done
+        self.done_units = 0
+        self.rows = 0
+        self.bytes = 0
+        self.stage = ""
+        self.file = ""
+        self.started = time.perf_counter()
+
+    def check_cancelled(self):
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            raise CancelledError("Processing cancelled")
+
+    def start_stage(self, stage):
+        self.stage = stage
+        if self.run_log is not None:
+            self.run_log.start_stage(stage)
+        self._update()
+
+    def start_file(self, path):
+        self.file = path
+        if self.run_log is not None:
+            self.run_log.start_file(path, self.rows)
+        self._update()
+
+    def advance(self, rows=0, nbytes=0):
+        self.rows += rows
+        self.bytes += nbytes
+        self._update()
+
+    def finish_file(self, path=None, rows=0, units=1):
+        """Count path as done; units > 1 when one pass produced the work of several stages."""
+        path = path or self.file
+        nbytes = os.path.getsize(path) if path and os.path.exists(path) else 0
+        self.done_units += units
+        self.advance(rows=rows, nbytes=nbytes)
+        if self.run_log is not None:
+            self.run_log.finish_file(path, self.rows, nbytes)
+        if self.on_file_done is not None:
+            self.on_file_done(path)
+
+    def skip_file(self, path):
+        """Count path as done without reading it (e.g. unchanged since the last run)."""
+        self.file = path
+        self.done_units += 1
+        self._update()
+
+    def phase(self, name, output=None):
+        """Context manager timing one step (read, transform, write, chart, pdf) of the current file.
+
+        output, if given (a path or a list of paths), is counted as bytes
+        written once the step is done.
+        Without a run_log this does nothing.
+        """
+        if self.run_log is None:
+            return contextlib.nullcontext()
+        return self.run_log.phase(name, output)
+
+    def add_phase(self, name, wall_s, cpu_s=0.0):
+        """Record a step of the current file that was timed elsewhere, e.g. a parse in a worker process."""
+        if self.run_log is not None:
+            self.run_log.add_phase(name, wall_s, cpu_s)
+
+    def snapshot(self):
+        elapsed = max(time.perf_counter() - self.started, 1e-9)
+        fraction = min(self.done_units / self.total_units, 1.0)
+        eta = elapsed * (1 - fraction) / fraction if fraction else None
+        return {
+            "stage": self.stage,
+            "file": self.file,
+            "fraction": fraction,
+            "elapsed": elapsed,
+            "eta": eta,
+            "rows_per_s": self.rows / elapsed,
+            "mb_per_s": self.bytes / elapsed / (1024 * 1024),
+        }
+
+    def _update(self):
+        self.check_cancelled()
+        if self.callback is not None:
+            self.callback(self.snapshot())
+
+
+class ConsoleNotifier:
+    """messagebox-compatible notifier that prints instead of showing dialogs."""
+
+    def showinfo(self, title, message):
+        print(f"[{title}] {message}")
+
+    def showwarning(self, title, message):
+        print(f"[{title}] {message}", file=sys.stderr)
+
+    def showerror(self, title, message):
+        print(f"[{title}] {message}", file=sys.stderr)
+
+
+# 功能名称与两个界面中的复选框一致
+OPERATIONS = ("merge", "clean", "format_adjust", "rename_columns", "generate_summary",
+              "enhanced_template_export", "advanced_data_analysis", "smart_multi_file_merge",
+              "one_click_format_beautification", "template_export_with_logo", "data_analysis_report",
+              "smart_cross_table_merge", "enterprise_format_beautification", "authorization_management")
+# 输出单个文件、需要保存路径的功能
+SINGLE_OUTPUT_OPERATIONS = ("merge", "advanced_data_analysis", "smart_multi_file_merge", "smart_cross_table_merge")
+# 逐个读取工作簿的功能，运行前会预先并行解析
+CACHED_OPERATIONS = ("format_adjust", "rename_columns", "enhanced_template_export",
+                     "one_click_format_beautification", "template_export_with_logo",
+                     "data_analysis_report", "smart_cross_table_merge", "enterprise_format_beautification")
+# 逐行流式读取、不需要整表加载的功能
+STREAMING_OPERATIONS = ("merge", "clean", "smart_multi_file_merge", "generate_summary", "advanced_data_analysis")
+# 逐个文件处理、计入进度的功能
+FILE_OPERATIONS = STREAMING_OPERATIONS + CACHED_OPERATIONS
+
+
+def output_path(file, suffix, output_dir=None, ext=".xlsx"):
+    """Return <name><suffix><ext> next to file, or inside output_dir when given."""
+    stem = os.path.splitext(os.path.basename(file))[0]
+    directory = output_dir if output_dir else os.path.dirname(file)
+    return os.path.join(directory, stem + suffix + ext)
+
+
+def parse_column_mapping(mapping_text):
+    """Parse "Old1:New1,Old2:New2" into a rename dict."""
+    return dict(item.split(":") for item in mapping_text.split(","))
@@ -0,0 +1,1155 @@
+import contextlib
+import datetime
+import itertools
+import math
+import os
+
+import numpy as np
+import pandas as pd
+import xlsxwriter
+from openpyxl import load_workbook
+from pandas.io.parsers import TextParser
+
+from lazy_excel_common import CACHED_OPERATIONS, FILE_OPERATIONS, CancelledError, ConsoleNotifier, Progress, output_path
+from lazy_excel_io import (DEFAULT_COMPACT, DEFAULT_STAGING_DIR, SHEET_COLUMN, SheetSelection, StagingCache,
+                           WorkbookCache, file_digest, pq, read_workbook)
+from lazy_excel_join import detect_join_key, multi_way_join
+from lazy_excel_manifest import DEFAULT_MANIFEST_PATH, RunManifest
+from lazy_excel_runlog import DEFAULT_PROFILE, DEFAULT_RUN_LOG, RunLog
+from lazy_excel_stats import SheetStats
+
+
+# 流式写入时每隔多少行汇报一次进度并检查取消
+PROGRESS_EVERY_ROWS = 1000
+# Excel 工作表的行数 (含表头) 和列数上限；超出的单元格 xlsxwriter 不写入也不报错
+EXCEL_MAX_ROWS = 1048576
+EXCEL_MAX_COLUMNS = 16384
+
+
+def _no_phase(name, output=None):
+    return contextlib.nullcontext()
+
+
+def _check_sheet_size(rows, columns):
+    """Raise ValueError like pd.DataFrame.to_excel if rows x columns (header included) do not fit one sheet."""
+    if rows > EXCEL_MAX_ROWS or columns > EXCEL_MAX_COLUMNS:
+        raise ValueError(f"This sheet is too large! Your sheet size is: {rows}, {columns} "
+                         f"Max sheet size is: {EXCEL_MAX_ROWS}, {EXCEL_MAX_COLUMNS}")
+
+
+def _header_names(values):
+    """Name header cells the way pd.read_excel does (Unnamed: n, duplicate suffixes)."""
+    names = []
+    seen = {}
+    for i, value in enumerate(values):
+        name = f"Unnamed: {i}" if value is None else str(value)
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
+
+def _is_empty(value):
+    return value is None or (isinstance(value, float) and math.isnan(value)) or value is pd.NaT
+
+
+def _convert_rows(rows, width, chunk_rows):
+    """Yield rows with their cells converted like pd.read_excel converts them, chunk_rows rows at a time.
+
+    Numbers stored as text become numbers and "NA"-like strings become
+    missing, so streamed rows hold the same values as a loaded frame, a
+    Parquet copy or the pd.read_excel fallback. Types are inferred per chunk.
+    """
+    rows = iter(rows)
+    names = list(range(width))
+    while True:
+        chunk = [tuple(row[:width]) + (None,) * (width - len(row)) for row in itertools.islice(rows, chunk_rows)]
+        if not chunk:
+            return
+        if not width:
+            yield from chunk
+            continue
+        frame = TextParser(chunk, names=names, header=None).read()
+        for row in frame.astype(object).itertuples(index=False, name=None):
+            yield tuple(None if _is_empty(v) else v for v in row)
+
+
+def _used_width(worksheet, header, bounds):
+    """Number of columns pd.read_excel keeps: up to the last cell holding a value in the header or the data rows.
+
+    openpyxl pads read-only rows to the sheet dimension, which also counts
+    formatted empty cells. Only when the header ends in empty cells are the
+    data rows scanned, and then only in those trailing columns.
+    """
+    width = len(header)
+    while width and header[width - 1] in (None, ""):
+        width -= 1
+    if width == len(header):
+        return width
+    used = width
+    for row in worksheet.iter_rows(min_row=2, max_row=bounds.get("max_row"), min_col=width + 1,
+                                   max_col=len(header), values_only=True):
+        for i in range(len(row) - 1, used - width - 1, -1):
+            if row[i] not in (None, ""):
+                used = width + i + 1
+                break
+        if used == len(header):
+            break
+    return used
+
+
+def sheet_names(path):
+    """Return the sheet names of path in workbook order."""
+    if path.lower().endswith((".xlsx", ".xlsm")):
+        workbook = load_workbook(path, read_only=True)
+        try:
+            return workbook.sheetnames
+        finally:
+            workbook.close()
+    with pd.ExcelFile(path) as excel_file:
+        return excel_file.sheet_names
+
+
+def _iter_staged_batches(staged, columns=None, rows=None, chunk_rows=10000):
+    """Yield the selected columns and (start, stop) rows of a Parquet copy as record batches."""
+    parquet_file = pq.ParquetFile(staged, memory_map=True)
+    start, stop, _ = slice(*(rows or (None, None))).indices(parquet_file.metadata.num_rows)
+    position = 0
+    for batch in parquet_file.iter_batches(batch_size=chunk_rows, columns=columns):
+        if position >= stop:
+            break
+        end = position + batch.num_rows
+        if end > start:
+            yield batch.slice(max(start - position, 0), min(end, stop) - max(start, position))
+        position = end
+
+
+def _iter_one_sheet(path, sheet, selection, chunk_rows=10000, staging=None):
+    """Yield the header and data rows of one sheet, limited to the selected columns and rows."""
+    wanted = set(selection.usecols) if selection.usecols is not None else None
+    # Parquet 暂存副本只保存第一个工作表
+    staged = staging.staged_path(path) if staging is not None and sheet == 0 else None
+    if staged is not None:
+        names = pq.read_schema(staged).names
+        columns = names if wanted is None else [name for name in names if name in wanted]
+        yield tuple(columns)
+        for batch in _iter_staged_batches(staged, columns, selection.rows, chunk_rows):
+            yield from zip(*(column.to_pylist() for column in batch.columns))
+        return
+
+    if path.lower().endswith((".xlsx", ".xlsm")):
+        workbook = load_workbook(path, read_only=True, data_only=True)
+        try:
+            worksheet = workbook.worksheets[sheet] if isinstance(sheet, int) else workbook[sheet]
+            header = next(worksheet.iter_rows(max_row=1, values_only=True), None)
+            if header is None:
+                return
+            # 行范围和列范围直接交给 openpyxl，范围外的单元格不会被创建
+            start, stop = selection.rows or (None, None)
+            bounds = {"min_row": 2 + (start or 0)}
+            if stop is not None:
+                bounds["max_row"] = 1 + stop
+            # 末尾只有格式、没有值的列与 pd.read_excel 一样不算在表内
+            header = header[:_used_width(worksheet, header, bounds)]
+            if not header:
+                return
+            bounds["max_col"] = len(header)
+            keep = None
+            if wanted is not None:
+                keep = [i for i, name in enumerate(_header_names(header)) if name in wanted]
+                header = tuple(_header_names(header)[i] for i in keep)
+                if keep:
+                    bounds.update(min_col=keep[0] + 1, max_col=keep[-1] + 1)
+            yield header
+            if stop is not None and stop <= (start or 0):
+                return
+            offset = bounds.get("min_col", 1) - 1
+            rows = worksheet.iter_rows(values_only=True, **bounds)
+            if keep is not None:
+                rows = (tuple(row[i - offset] if i - offset < len(row) else None for i in keep) for row in rows)
+            yield from _convert_rows(rows, len(header), chunk_rows)
+        finally:
+            workbook.close()
+        return
+
+    df = read_workbook(path, SheetSelection(sheet, selection.usecols, selection.rows))
+    yield tuple(df.columns)
+    for start in range(0, len(df), chunk_rows):
+        chunk = df.iloc[start:start + chunk_rows].astype(object)
+        for row in chunk.itertuples(index=False, name=None):
+            yield tuple(None if _is_empty(v) else v for v in row)
+
+
+def iter_sheet_rows(path, chunk_rows=10000, staging=None, selection=None):
+    """Yield the rows of the selected sheet of path as tuples, header row first.
+
+    An up-to-date Parquet copy in staging is read batch by batch. .xlsx files
+    are streamed with openpyxl's read-only iterator so only one chunk is ever
+    held in memory, and each chunk is converted like pd.read_excel converts
+    cells; other formats fall back to pd.read_excel. selection (a
+    SheetSelection, default the whole first sheet) limits the columns and rows
+    read; with sheet=None all sheets are stacked like read_workbook does, under
+    the union of their columns and a leading SHEET_COLUMN.
+    """
+    selection = selection or SheetSelection()
+    if selection.sheet is not None:
+        yield from _iter_one_sheet(path, selection.sheet, selection, chunk_rows, staging)
+        return
+
+    names = sheet_names(path)
+    headers = []
+    for name in names:
+        rows = _iter_one_sheet(path, name, selection)
+        headers.append(_header_names(next(rows, ())))
+        rows.close()
+    columns = [SHEET_COLUMN]
+    for header in headers:
+        columns.extend(name for name in header if name not in columns)
+    yield tuple(columns)
+    for name, header in zip(names, headers):
+        position = {column: i for i, column in enumerate(header)}
+        index = [position.get(column) for column in columns[1:]]
+        rows = _iter_one_sheet(path, name, selection, chunk_rows)
+        next(rows, None)
+        # 每个工作表末尾的空行与 pd.read_excel 一样先去掉，再加上工作表名
+        for row in _trim_trailing_empty(rows):
+            width = len(row)
+            yield (name,) + tuple(row[i] if i is not None and i < width else None for i in index)
+
+
+def read_header(path, staging=None, selection=None):
+    """Return the column names of path without parsing the data rows."""
+    for row in iter_sheet_rows(path, staging=staging, selection=selection):
+        return _header_names(row)
+    return []
+
+
+def unify_schema(files, staging=None, selection=None):
+    """Return the union of all column names, in order of first appearance."""
+    columns = []
+    known = set()
+    for file in files:
+        for name in read_header(file, staging, selection):
+            if name not in known:
+                known.add(name)
+                columns.append(name)
+    return columns
+
+
+def _trim_trailing_empty(rows):
+    """Drop empty rows at the end of rows but keep those in between, like pd.read_excel."""
+    pending_empty = []
+    for row in rows:
+        if all(_is_empty(v) for v in row):
+            pending_empty.append(row)
+            continue
+        yield from pending_empty
+        pending_empty = []
+        yield row
+
+
+def _iter_aligned_rows(file, columns, staging=None, selection=None):
+    """Yield data rows of file re-ordered to match the unified columns."""
+    rows = iter_sheet_rows(file, staging=staging, selection=selection)
+    header = next(rows, None)
+    if header is None:
+        return
+    position = {name: i for i, name in enumerate(_header_names(header))}
+    index = [position.get(name) for name in columns]
+    for row in _trim_trailing_empty(rows):
+        width = len(row)
+        yield [row[i] if i is not None and i < width else None for i in index]
+
+
+def iter_sheet_chunks(path, chunk_rows=10000, staging=None, selection=None):
+    """Yield the selected sheet of path as DataFrames of at most chunk_rows rows.
+
+    Only one chunk is in memory at a time. Column names follow pd.read_excel,
+    and the rows are already converted the way pd.read_excel converts cells
+    (see iter_sheet_rows), so numbers stored as text are numbers and
+    "NA"-like strings are missing; dtypes are inferred per chunk.
+    """
+    selection = selection or SheetSelection()
+    staged = staging.staged_path(path) if staging is not None and selection.sheet == 0 else None
+    if staged is not None:
+        columns = selection.usecols
+        if columns is not None:
+            # 与 pd.read_excel 一样按工作表中的顺序，而不是 usecols 的顺序
+            wanted = set(columns)
+            columns = [name for name in pq.read_schema(staged).names if name in wanted]
+        for batch in _iter_staged_batches(staged, columns, selection.rows, chunk_rows):
+            yield batch.to_pandas()
+        return
+
+    rows = iter_sheet_rows(path, chunk_rows=chunk_rows, selection=selection)
+    header = next(rows, None)
+    if header is None:
+        return
+    columns = _header_names(header)
+    width = len(columns)
+    chunk = []
+    for row in _trim_trailing_empty(rows):
+        chunk.append(tuple(row[:width]) + (None,) * (width - len(row)))
+        if len(chunk) == chunk_rows:
+            yield pd.DataFrame(chunk, columns=columns)
+            chunk = []
+    if chunk:
+        yield pd.DataFrame(chunk, columns=columns)
+
+
+def sheet_stats(path, load=None, chunk_rows=10000, staging=None, progress=None, selection=None):
+    """Compute SheetStats for path.
+
+    With load the frame is taken from it (e.g. a WorkbookCache that already
+    holds it); otherwise the sheet is streamed in chunks of chunk_rows rows.
+    """
+    stats = SheetStats()
+    if load is not None:
+        stats.add(load(path))
+        return stats
+    for chunk in iter_sheet_chunks(path, chunk_rows, staging, selection):
+        stats.add(chunk)
+        if progress is not None:
+            progress.advance(rows=len(chunk))
+    return stats
+
+
+def _non_empty_columns(files, columns, staging=None, selection=None):
+    """Return the set of unified columns holding at least one value in any file.
+
+    A bitmap marks the columns already seen, so each row only tests the
+    columns still empty, and reading stops once every column has a value.
+    """
+    seen = bytearray(len(columns))
+    pending = list(range(len(columns)))
+    for file in files:
+        if not pending:
+            break
+        for row in _iter_aligned_rows(file, columns, staging, selection):
+            found = [i for i in pending if not _is_empty(row[i])]
+            if found:
+                for i in found:
+                    seen[i] = 1
+                pending = [i for i in pending if not seen[i]]
+                if not pending:
+                    break
+    return {name for name, flag in zip(columns, seen) if flag}
+
+
+def stream_merge(files, save_path, drop_empty_rows=False, drop_empty_columns=False, progress=None, staging=None,
+                 selection=None):
+    """Merge files into save_path one row at a time, without building a merged DataFrame.
+
+    The schema is unified once from the header rows, then each file is streamed
+    into an xlsxwriter workbook in constant_memory mode, so memory use does not
+    grow with the number or size of the inputs. Returns the number of data rows written.
+    Raises ValueError, and removes save_path, once the rows no longer fit one sheet.
+    When progress is given it is advanced every PROGRESS_EVERY_ROWS rows and
+    each file's streaming time is recorded as its "stream" phase; writing the
+    finished workbook, and its size, are recorded on the last file.
+    Files with an up-to-date Parquet copy in staging are read from it, and
+    selection (a SheetSelection) chooses the sheets, columns and rows merged.
+    """
+    phase = progress.phase if progress is not None else _no_phase
+    # 只有一个文件时 (逐文件清理)，读表头和查找非空列的扫描也记在该文件上
+    single = progress is not None and len(files) == 1
+    if single:
+        progress.start_file(files[0])
+    with phase("schema"):
+        columns = unify_schema(files, staging, selection)
+        if drop_empty_columns:
+            non_empty = _non_empty_columns(files, columns, staging, selection)
+            keep = [i for i, name in enumerate(columns) if name in non_empty]
+        else:
+            keep = list(range(len(columns)))
+    _check_sheet_size(1, len(keep))
+
+    workbook = xlsxwriter.Workbook(save_path, {"constant_memory": True})
+    completed = False
+    last = None
+    try:
+        worksheet = workbook.add_worksheet("Sheet1")
+        header_format = workbook.add_format({"bold": True})
+        formats = {"datetime": workbook.add_format({"num_format": "yyyy-mm-dd hh:mm:ss"}),
+                   "date": workbook.add_format({"num_format": "yyyy-mm-dd"})}
+
+        worksheet.write_row(0, 0, [columns[i] for i in keep], header_format)
+        row_num = 1
+        for index, file in enumerate(files):
+            if progress is not None and not single:
+                progress.start_file(file)
+            file_start = row_num
+            with phase("stream"):
+                for row in _iter_aligned_rows(file, columns, staging, selection):
+                    values = [row[i] for i in keep]
+                    if drop_empty_rows and all(_is_empty(v) for v in values):
+                        continue
+                    # 写满一个工作表后报错，不能把截断的结果当作合并成功
+                    _check_sheet_size(row_num + 1, len(keep))
+                    for col_num, value in enumerate(values):
+                        if not _is_empty(value):
+                            _write_value(worksheet, row_num, col_num, value, formats)
+                    row_num += 1
+                    if progress is not None and (row_num - file_start) % PROGRESS_EVERY_ROWS == 0:
+                        progress.advance(rows=PROGRESS_EVERY_ROWS)
+            if progress is not None:
+                rows = (row_num - file_start) % PROGRESS_EVERY_ROWS
+                if index < len(files) - 1:
+                    progress.finish_file(file, rows=rows)
+                else:
+                    last = file, rows
+        # 最后一个文件在工作簿写出后才完成，写出时间和文件大小记在它上面
+        with phase("write", output=save_path):
+            workbook.close()
+        completed = True
+        if last is not None:
+            progress.finish_file(*last)
+    finally:
+        if not completed:
+            workbook.close()
+        # 取消或出错时不留下写了一半的文件
+        if not completed and os.path.exists(save_path):
+            os.remove(save_path)
+    return row_num - 1
+
+
+# 格式化功能: (阶段名称, 输出文件后缀, 表头格式)
+FORMAT_STYLES = {
+    "format_adjust": ("Quick Format Adjustment", "_formatted",
+                      {'bold': True, 'align': 'center', 'valign': 'vcenter'}),
+    "one_click_format_beautification": ("One-Click Format Beautification", "_beautified",
+                                        {'bold': True, 'align': 'center', 'valign': 'vcenter'}),
+    "enterprise_format_beautification": ("Enterprise Format Beautification", "_enterprise_beautified",
+                                         {'bold': True, 'align': 'center', 'valign': 'vcenter', 'bg_color': '#D9EAD3'}),
+}
+# 可以共用一次序列化写出的导出: (阶段名称, 输出文件后缀, 表头格式, 是否自动列宽, 是否插入 LOGO)
+EXPORT_VARIANTS = {name: (stage, suffix, header_style, True, False)
+                   for name, (stage, suffix, header_style) in FORMAT_STYLES.items()}
+EXPORT_VARIANTS.update({
+    "enhanced_template_export": ("Enhanced Template Export", "_enhanced_template", None, False, False),
+    "template_export_with_logo": ("Template Export With LOGO", "_template_with_logo", None, False, True),
+})
+
+
+# 自动列宽的上限，避免超长文本把列撑得过宽
+MAX_COLUMN_WIDTH = 60
+# Excel "常规" 格式最多用 11 个字符显示一个数字
+GENERAL_NUMBER_WIDTH = 11
+# pandas 写出日期时间使用的 "YYYY-MM-DD HH:MM:SS" 格式长度
+DATETIME_WIDTH = 19
+
+
+def _integer_width(values):
+    """Display width of the widest integer in values, from its digit count."""
+    if values.empty:
+        return 0
+    widths = []
+    for value in (values.min(), values.max()):
+        value = int(value)
+        widths.append(len(str(abs(value))) + (value < 0))
+    return max(widths)
+
+
+def _text_width(values):
+    """Longest string length in values, vectorized for str cells."""
+    try:
+        lengths = values.str.len()
+    except AttributeError:
+        # 完全没有字符串的对象列
+        return int(values.map(lambda v: len(str(v))).max())
+    # 对象列中的非字符串单元格 (数字、日期等) 单独转换，通常数量很少
+    others = values[lengths.isna()]
+    if not others.empty:
+        lengths = pd.concat([lengths.dropna(), others.map(lambda v: len(str(v)))])
+    return int(lengths.max()) if not lengths.empty else 0
+
+
+def column_display_width(series):
+    """Estimate the widest cell of series without formatting every cell as a string."""
+    values = series.dropna()
+    if values.empty:
+        return 0
+    if pd.api.types.is_bool_dtype(values):
+        return 5 if not values.all() else 4
+    if pd.api.types.is_integer_dtype(values):
+        return _integer_width(values)
+    if pd.api.types.is_float_dtype(values):
+        finite = values[np.isfinite(values)]
+        if finite.empty:
+            return 3
+        if (finite % 1 == 0).all():
+            return min(_integer_width(finite), GENERAL_NUMBER_WIDTH)
+        return GENERAL_NUMBER_WIDTH
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return DATETIME_WIDTH
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        used = values.cat.remove_unused_categories().cat.categories
+        return _text_width(pd.Series(used, dtype=object))
+    return _text_width(values)
+
+
+def estimate_column_widths(df, sample_rows=None, max_width=MAX_COLUMN_WIDTH, padding=2):
+    """Return a column width per column of df for xlsxwriter's set_column.
+
+    Numeric columns are measured from their min/max digit counts and text
+    columns with the vectorized .str.len(). With sample_rows set, sheets longer
+    than that are measured on an evenly spaced sample of rows. Widths include
+    the header and padding and never exceed max_width.
+    """
+    if sample_rows and len(df) > sample_rows:
+        step = len(df) / sample_rows
+        df = df.iloc[(np.arange(sample_rows) * step).astype(int)]
+    widths = []
+    for col_num in range(df.shape[1]):
+        data_width = column_display_width(df.iloc[:, col_num])
+        header_width = len(str(df.columns[col_num]))
+        widths.append(min(max(data_width, header_width) + padding, max_width))
+    return widths
+
+
+def _column_kind(series):
+    """Pick the xlsxwriter call for a whole column: number, boolean, datetime or value (per cell)."""
+    dtype = series.dtype
+    if pd.api.types.is_bool_dtype(dtype):
+        return "boolean"
+    if pd.api.types.is_numeric_dtype(dtype):
+        # 含无穷大的列和 to_excel 一样写成 "inf" 文本，需要逐个单元格判断
+        if pd.api.types.is_float_dtype(dtype) and np.isinf(series.to_numpy(dtype="float64", na_value=np.nan)).any():
+            return "value"
+        return "number"
+    if pd.api.types.is_datetime64_dtype(dtype):
+        return "datetime"
+    return "value"
+
+
+def _write_value(worksheet, row, col, value, formats):
+    """Write one cell of a mixed column the way pd.DataFrame.to_excel does."""
+    if isinstance(value, datetime.datetime):
+        worksheet.write_datetime(row, col, value, formats["datetime"])
+    elif isinstance(value, datetime.date):
+        worksheet.write_datetime(row, col, value, formats["date"])
+    elif isinstance(value, datetime.time):
+        # pandas 把时刻写成 "13:30:00" 这样的文本
+        worksheet.write_string(row, col, str(value))
+    elif isinstance(value, float) and math.isinf(value):
+        worksheet.write_string(row, col, "inf" if value > 0 else "-inf")
+    else:
+        worksheet.write(row, col, value)
+
+
+def _cell_values(series):
+    """Return series as a list of Python values with None for every missing cell (NaN, NaT, NA)."""
+    values = series.to_numpy(dtype=object)
+    missing = series.isna().to_numpy()
+    if missing.any():
+        values = values.copy() if values.base is not None else values
+        values[missing] = None
+    return values.tolist()
+
+
+def _cell_writer(worksheet, kind, formats):
+    if kind == "number":
+        return worksheet.write_number
+    if kind == "boolean":
+        return worksheet.write_boolean
+    if kind == "datetime":
+        return lambda row, col, value: worksheet.write_datetime(row, col, value, formats["datetime"])
+    return lambda row, col, value: _write_value(worksheet, row, col, value, formats)
+
+
+def write_exports(df, targets, progress=None, chunk_rows=PROGRESS_EVERY_ROWS):
+    """Write df to several .xlsx files in one pass over its rows.
+
+    targets is a list of (save_path, header_style, column_widths, logo_path);
+    header_style, column_widths and logo_path may be None. Every target is an xlsxwriter
+    workbook in constant_memory mode whose formats are registered before any
+    cell is written. The frame is converted to Python values chunk_rows rows
+    at a time and each chunk is written to all targets, so the conversion is
+    done once however many targets there are. Cells are written like
+    pd.DataFrame.to_excel(index=False) writes them, and a frame too large for
+    one sheet raises ValueError before anything is written. A cancelled or
+    failed run leaves no partial outputs.
+    """
+    _check_sheet_size(len(df) + 1, df.shape[1])
+    kinds = [_column_kind(df.iloc[:, col_num]) for col_num in range(df.shape[1])]
+    workbooks = []
+    completed = False
+    try:
+        sheets = []
+        for save_path, header_style, column_widths, logo_path in targets:
+            workbook = xlsxwriter.Workbook(save_path, {"constant_memory": True})
+            workbooks.append(workbook)
+            worksheet = workbook.add_worksheet("Sheet1")
+            header_format = workbook.add_format(header_style) if header_style else None
+            # 与 pd.DataFrame.to_excel 使用相同的日期格式
+            formats = {"datetime": workbook.add_format({"num_format": "YYYY-MM-DD HH:MM:SS"}),
+                       "date": workbook.add_format({"num_format": "YYYY-MM-DD"})}
+            for col_num, column_width in enumerate(column_widths or []):
+                worksheet.set_column(col_num, col_num, column_width)
+            for col_num, value in enumerate(df.columns):
+                worksheet.write(0, col_num, value, header_format)
+            if logo_path is not None:
+                worksheet.insert_image('A1', logo_path)  # 插入 LOGO
+            sheets.append([_cell_writer(worksheet, kind, formats) for kind in kinds])
+
+        for start in range(0, len(df), chunk_rows):
+            chunk = df.iloc[start:start + chunk_rows]
+            rows = list(zip(*(_cell_values(chunk.iloc[:, col_num]) for col_num in range(chunk.shape[1]))))
+            for writers in sheets:
+                for row_num, row in enumerate(rows, start=start + 1):
+                    for col_num, value in enumerate(row):
+                        if value is not None:
+                            writers[col_num](row_num, col_num, value)
+            if progress is not None:
+                progress.check_cancelled()
+        completed = True
+    finally:
+        for workbook in workbooks:
+            workbook.close()
+        # 取消或出错时不留下写了一半的文件
+        if not completed:
+            for save_path, *_ in targets:
+                if os.path.exists(save_path):
+                    os.remove(save_path)
+
+
+def _start(progress, files, stage):
+    if progress is None:
+        progress = Progress(len(files))
+    progress.start_stage(stage)
+    return progress
+
+
+def clean_files(files, output_dir=None, load=None, progress=None, staging=None, selection=None):
+    """Drop all-empty rows and columns and write <name>_cleaned.xlsx for each file.
+
+    Without load each sheet is cleaned in two streaming passes: the first
+    finds the non-empty columns, the second writes the non-empty rows of those
+    columns with a constant-memory writer, so sheets larger than RAM work.
+    With load (e.g. a WorkbookCache that already holds the frames) the frame
+    is cleaned in memory instead.
+    """
+    progress = _start(progress, files, "Clean Data")
+    for file in files:
+        save_path = output_path(file, "_cleaned", output_dir)
+        if load is None:
+            stream_merge([file], save_path, drop_empty_rows=True, drop_empty_columns=True, progress=progress,
+                         staging=staging, selection=selection)
+            continue
+        progress.start_file(file)
+        with progress.phase("read"):
+            df = load(file)
+        with progress.phase("transform"):
+            df = df.dropna(how='all', axis=0).dropna(how='all', axis=1)
+        with progress.phase("write", output=save_path):
+            df.to_excel(save_path, index=False)
+        progress.finish_file(file, rows=len(df))
+
+
+def format_files(files, style="format_adjust", output_dir=None, load=pd.read_excel, progress=None,
+                 width_sample_rows=None):
+    """Write a copy of each file with a formatted header row and fitted column widths.
+
+    width_sample_rows limits column-width estimation to a sample of rows, see
+    estimate_column_widths. Use export_variants to write several styles at once.
+    """
+    export_variants({style: files}, output_dir, load=load, progress=progress, width_sample_rows=width_sample_rows)
+
+
+def export_variants(variants, output_dir=None, load=pd.read_excel, progress=None, width_sample_rows=None,
+                    logo_path="logo.png"):
+    """Write the formatting and template exports of each file from one read of it.
+
+    variants maps export names (keys of EXPORT_VARIANTS) to the files each is
+    requested for. Every file is loaded once, its column widths are estimated
+    once, and all of its requested outputs are written together by
+    write_exports, so ticking several formatting options costs one pass over
+    the rows instead of one per option.
+    """
+    names = [name for name in EXPORT_VARIANTS if name in variants]
+    requested = {name: set(variants[name]) for name in names}
+    files = list(dict.fromkeys(file for name in names for file in variants[name]))
+    stage = EXPORT_VARIANTS[names[0]][0] if len(names) == 1 else f"Format and Template Export ({len(names)} styles)"
+    progress = _start(progress, files, stage)
+    for file in files:
+        wanted = [name for name in names if file in requested[name]]
+        progress.start_file(file)
+        with progress.phase("read"):
+            df = load(file)
+        with progress.phase("transform"):
+            column_widths = None
+            if any(EXPORT_VARIANTS[name][3] for name in wanted):
+                column_widths = estimate_column_widths(df, sample_rows=width_sample_rows)
+        targets = []
+        for name in wanted:
+            _, suffix, header_style, fit_widths, with_logo = EXPORT_VARIANTS[name]
+            targets.append((output_path(file, suffix, output_dir), header_style,
+                            column_widths if fit_widths else None, logo_path if with_logo else None))
+        with progress.phase("write", output=[target[0] for target in targets]):
+            write_exports(df, targets, progress=progress)
+        progress.finish_file(file, rows=len(df), units=len(wanted))
+
+
+def rename_columns(files, column_mapping, output_dir=None, load=pd.read_excel, progress=None, notify=None):
+    """Rename columns and write <name>_renamed.xlsx; files missing a mapped column are skipped."""
+    notify = notify or ConsoleNotifier()
+    progress = _start(progress, files, "Batch Rename Columns")
+    for file in files:
+        progress.start_file(file)
+        with progress.phase("read"):
+            df = load(file)
+        missing_columns = [col for col in column_mapping.keys() if col not in df.columns]
+        if missing_columns:
+            notify.showwarning("Warning", f"The following columns are missing:\n{', '.join(missing_columns)}")
+            progress.finish_file(file)
+            continue
+        save_path = output_path(file, "_renamed", output_dir)
+        with progress.phase("write", output=save_path):
+            df.rename(columns=column_mapping).to_excel(save_path, index=False)
+        progress.finish_file(file, rows=len(df))
+
+
+def summarize_files(files, output_dir=None, load=None, progress=None, notify=None, staging=None, selection=None):
+    """Write <name>_summary.xlsx with the sum, average and count of every column.
+
+    Sheets are streamed through SheetStats in one pass unless load is given.
+    """
+    notify = notify or ConsoleNotifier()
+    progress = _start(progress, files, "Generate Summary")
+    for file in files:
+        progress.start_file(file)
+        with progress.phase("read"):
+            stats = sheet_stats(file, load=load, staging=staging, progress=progress, selection=selection)
+        if not stats.numeric_columns:
+            notify.showwarning("Warning", f"No numeric columns found in file:\n{file}")
+            progress.finish_file(file)
+            continue
+        save_path = output_path(file, "_summary", output_dir)
+        with progress.phase("write", output=save_path):
+            stats.summary_table().to_excel(save_path, index=False)
+        progress.finish_file(file, rows=stats.rows if load is not None else 0)
+
+
+def export_templates(files, output_dir=None, load=pd.read_excel, progress=None):
+    """Write <name>_enhanced_template.xlsx for each file."""
+    export_variants({"enhanced_template_export": files}, output_dir, load=load, progress=progress)
+
+
+def export_templates_with_logo(files, logo_path="logo.png", output_dir=None, load=pd.read_excel, progress=None):
+    """Write <name>_template_with_logo.xlsx with logo_path inserted at A1."""
+    export_variants({"template_export_with_logo": files}, output_dir, load=load, progress=progress,
+                    logo_path=logo_path)
+
+
+def analyze_files(files, save_path, load=None, progress=None, staging=None, previous=None, selection=None):
+    """Write one row of shape and emptiness statistics per file to save_path.
+
+    Sheets are streamed through SheetStats in one pass unless load is given.
+    Rows in previous (file -> row computed earlier) are reused without
+    reading the file; the caller has already counted them as done. With
+    save_path=None nothing is written. Returns the rows in file order.
+    """
+    previous = previous or {}
+    progress = _start(progress, files, "Advanced Data Analysis")
+    analysis_results = []
+    for file in files:
+        if file in previous:
+            analysis_results.append(previous[file])
+            continue
+        progress.start_file(file)
+        with progress.phase("read"):
+            stats = sheet_stats(file, load=load, staging=staging, progress=progress, selection=selection)
+        analysis_results.append(stats.analysis_row(file))
+        progress.finish_file(file, rows=stats.rows if load is not None else 0)
+    if save_path:
+        with progress.phase("write", output=save_path):
+            pd.DataFrame(analysis_results).to_excel(save_path, index=False)
+    return analysis_results
+
+
+def report_files(files, output_dir=None, load=pd.read_excel, progress=None, notify=None, workers=None):
+    """Draw a chart per numeric column and write <name>_analysis_report.pdf for each file.
+
+    Long columns are drawn as histograms instead of one bar per row. Charts are
+    rendered with a reused Agg figure, in a process pool when there are many,
+    and go into the PDF as in-memory PNGs without temporary files.
+    """
+    from lazy_excel_report import ChartRenderer, chart_data, write_report
+
+    notify = notify or ConsoleNotifier()
+    progress = _start(progress, files, "Data Analysis Report")
+    with ChartRenderer(workers) as renderer:
+        for file in files:
+            progress.start_file(file)
+            with progress.phase("read"):
+                df = load(file)
+            numeric_columns = df.select_dtypes(include=['number']).columns
+            if numeric_columns.empty:
+                notify.showwarning("Warning", f"No numeric columns found in file:\n{file}")
+                progress.finish_file(file)
+                continue
+
+            with progress.phase("transform"):
+                charts = [chart_data(col, df[col]) for col in numeric_columns]
+            progress.check_cancelled()
+            with progress.phase("chart"):
+                images = renderer.render(charts)
+            save_path = output_path(file, "_analysis_report", output_dir, ext=".pdf")
+            with progress.phase("pdf", output=save_path):
+                write_report(images, save_path)
+            progress.finish_file(file, rows=len(df))
+
+
+def cross_table_merge(files, save_path, key=None, load=pd.read_excel, progress=None, notify=None):
+    """Outer-join all files on key and write the result plus join statistics to save_path.
+
+    With key=None the key is auto-detected from the columns shared by every
+    file. Files without the key column are reported, not silently dropped.
+    A key repeated inside one file joins only its first row; the other rows
+    are counted as "Duplicate Key Rows" and reported through notify.
+    The joined rows go to Sheet1 and per-file matched, unmatched and
+    duplicate key counts to a "Join Statistics" sheet. Returns the statistics.
+    """
+    notify = notify or ConsoleNotifier()
+    progress = _start(progress, files, "Smart Cross-Table Merge")
+    frames, labels, skipped = [], [], []
+    for file in files:
+        progress.start_file(file)
+        with progress.phase("read"):
+            df = load(file)
+        if key is None or key in df.columns:
+            frames.append(df)
+            labels.append(os.path.splitext(os.path.basename(file))[0])
+        else:
+            skipped.append(file)
+        progress.finish_file(file, rows=len(df))
+
+    if skipped:
+        notify.showwarning("Warning", f"Key column '{key}' not found, skipped:\n" + "\n".join(skipped))
+    if not frames:
+        raise ValueError(f"No file contains the key column '{key}'")
+    if key is None:
+        key = detect_join_key(frames)
+
+    progress.check_cancelled()
+    with progress.phase("join"):
+        merged_df, stats = multi_way_join(frames, key, labels)
+    with progress.phase("write", output=save_path), pd.ExcelWriter(save_path, engine='xlsxwriter') as writer:
+        merged_df.to_excel(writer, index=False, sheet_name='Sheet1')
+        stats.to_excel(writer, index=False, sheet_name='Join Statistics')
+    print(f"Cross-table join on '{key}':\n{stats.to_string(index=False)}")
+    duplicates = stats.iloc[:-1]
+    duplicates = duplicates[duplicates["Duplicate Key Rows"] > 0]
+    if len(duplicates):
+        notify.showwarning("Warning", f"Key column '{key}' repeats within a file; only the first row of each key "
+                           "was joined, the other rows were left out:\n"
+                           + "\n".join(f"{row['File']}: {row['Duplicate Key Rows']} rows"
+                                        for _, row in duplicates.iterrows()))
+    return stats
+
+
+# 逐文件功能的输出文件 (后缀, 扩展名)
+FILE_OUTPUTS = {
+    "clean": ("_cleaned", ".xlsx"),
+    "rename_columns": ("_renamed", ".xlsx"),
+    "generate_summary": ("_summary", ".xlsx"),
+    "enhanced_template_export": ("_enhanced_template", ".xlsx"),
+    "template_export_with_logo": ("_template_with_logo", ".xlsx"),
+    "data_analysis_report": ("_analysis_report", ".pdf"),
+}
+FILE_OUTPUTS.update({name: (suffix, ".xlsx") for name, (_, suffix, _) in FORMAT_STYLES.items()})
+
+
+def _operation_options(name, output_dir, column_mapping, logo_path, key, width_sample_rows, selection=None):
+    """Settings that change the output of operation name; its tasks rerun when they change."""
+    options = {"selection": list(selection or SheetSelection())}
+    if name in FILE_OUTPUTS:
+        options["output_dir"] = os.path.abspath(output_dir) if output_dir else None
+    if name == "rename_columns":
+        options["column_mapping"] = column_mapping or {}
+    elif name in FORMAT_STYLES:
+        options["width_sample_rows"] = width_sample_rows
+    elif name == "template_export_with_logo":
+        options["logo"] = [os.path.abspath(logo_path), file_digest(logo_path) if os.path.exists(logo_path) else None]
+    elif name == "smart_cross_table_merge":
+        options["key"] = key
+    return options
+
+
+def _pending_files(manifest, name, files, options, output_dir=None, save_path=None):
+    """Return the files operation name has to (re)process, or None if its output is current.
+
+    Per-file operations are checked file by file. Single-output operations are
+    current only if every input is unchanged; advanced_data_analysis then
+    lists just the files whose statistics row has to be recomputed.
+    """
+    if manifest is None:
+        return files
+    if name in FILE_OUTPUTS:
+        suffix, ext = FILE_OUTPUTS[name]
+        return [file for file in files
+                if not manifest.is_current(RunManifest.task_key(name, file), [file], options,
+                                           [output_path(file, suffix, output_dir, ext=ext)])]
+    if save_path and manifest.is_current(RunManifest.task_key(name, save_path), files, options, [save_path]):
+        return None
+    if name == "advanced_data_analysis":
+        return [file for file in files
+                if not manifest.is_current(RunManifest.task_key(name, file), [file], options, [])]
+    return files
+
+
+def _record_files(manifest, name, files, options, output_dir=None, save_path=None, all_files=None):
+    """Record the tasks of operation name that just finished and save the manifest."""
+    if manifest is None:
+        return
+    if name in FILE_OUTPUTS:
+        suffix, ext = FILE_OUTPUTS[name]
+        for file in files:
+            manifest.record(RunManifest.task_key(name, file), [file], options,
+                            [output_path(file, suffix, output_dir, ext=ext)])
+    elif save_path:
+        manifest.record(RunManifest.task_key(name, save_path), all_files, options, [save_path])
+    manifest.save()
+
+
+# 合并执行的导出各自的完成提示
+# 逐文件功能全部完成后的提示，按 OPERATIONS 的顺序
+FILE_MESSAGES = {
+    "clean": "Data cleaning completed",
+    "format_adjust": "Format adjustment completed",
+    "rename_columns": "Column renaming completed",
+    "generate_summary": "Summary template generation completed",
+    "enhanced_template_export": "Enhanced template export completed",
+    "one_click_format_beautification": "One-click format beautification completed",
+    "template_export_with_logo": "Template export with LOGO completed",
+    "data_analysis_report": "Data analysis report generated",
+    "enterprise_format_beautification": "Enterprise format beautification completed",
+}
+
+
+def run_operations(files, operations, output_dir=None, save_paths=None, column_mapping=None,
+                   logo_path="logo.png", key=None, workers=None, width_sample_rows=None,
+                   staging_dir=DEFAULT_STAGING_DIR, manifest_path=DEFAULT_MANIFEST_PATH, selection=None,
+                   compact=DEFAULT_COMPACT, run_log_path=DEFAULT_RUN_LOG, profile=DEFAULT_PROFILE, progress=None,
+                   notify=None):
+    """Run the named operations over files.
+
+    This is the engine behind both GUI builds and the lazy-excel command line.
+    The per-file operations run first, batch by batch: WorkbookCache.batches
+    parses as many workbooks as fit in the cache budget, in parallel, every
+    per-file operation runs on that batch in the order of OPERATIONS, and only
+    then is the next batch parsed, so each workbook is parsed once within a
+    bounded amount of memory. The formatting and template exports
+    (EXPORT_VARIANTS) of a file are written together, see export_variants.
+    Per-file outputs go next to each input, or to output_dir when given.
+    Single-output operations then follow in the order of OPERATIONS; they
+    write to save_paths[name] and are skipped if it is missing. Files that
+    cannot be opened are reported through notify and left out of every stage. With staging_dir set (default:
+    LAZY_EXCEL_STAGING_DIR) the first sheet of every input is converted to
+    Parquet up front, in parallel, so the streaming operations read it too
+    and later runs skip the XML parse. With manifest_path set (default:
+    LAZY_EXCEL_MANIFEST) the run is incremental: tasks whose inputs, options
+    and outputs are unchanged since the last run are skipped. selection (a
+    SheetSelection) chooses the sheets, columns and rows every operation
+    reads, default the whole first sheet. With compact (default: on unless
+    LAZY_EXCEL_COMPACT=0) loaded frames get the smallest dtypes that hold
+    their values and the bytes saved per file are printed. With run_log_path
+    set (default: LAZY_EXCEL_RUN_LOG) per-stage and per-file timings are
+    appended to that JSONL file; profile (default: LAZY_EXCEL_PROFILE) also
+    records cProfile and tracemalloc data, see RunLog.
+    UI feedback goes through notify, which defaults to the console.
+    """
+    notify = notify or ConsoleNotifier()
+    save_paths = save_paths or {}
+    files = list(files)
+    if progress is None:
+        progress = Progress(len(files), len([name for name in operations if name in FILE_OPERATIONS]))
+
+    # 增量模式：先比对清单，未变化的文件直接计为完成
+    manifest = RunManifest(manifest_path) if manifest_path else None
+    options = {name: _operation_options(name, output_dir, column_mapping, logo_path, key, width_sample_rows, selection)
+               for name in operations}
+    pending = {}
+    for name in operations:
+        if name not in FILE_OPERATIONS:
+            continue
+        pending[name] = _pending_files(manifest, name, files, options[name], output_dir, save_paths.get(name))
+        todo = set(pending[name] or [])
+        skipped = [file for file in files if file not in todo]
+        for file in skipped:
+            progress.skip_file(file)
+        if manifest is not None and skipped:
+            print(f"{name}: {len(skipped)} of {len(files)} files unchanged, skipped")
+
+    def record(name, done):
+        _record_files(manifest, name, done, options[name], output_dir, save_paths.get(name), files)
+
+    # 运行日志：Progress 把阶段和文件的边界转给 RunLog
+    run_log = RunLog(run_log_path, profile) if run_log_path or profile else None
+    if run_log is not None:
+        progress.run_log = run_log
+        run_log.start(operations, files)
+    status = "error"
+
+    # 每次运行只解析一次工作簿，各功能共享同一个 DataFrame
+    staging = StagingCache(staging_dir) if staging_dir else None
+    cache = WorkbookCache(staging=staging, selection=selection, compact=compact)
+    try:
+        to_load = [file for file in files
+                   if any(file in (pending.get(name) or []) for name in CACHED_OPERATIONS)]
+        failed = {}
+
+        def skip_failed(errors):
+            """Leave the files in errors out of every stage still to run."""
+            nonlocal files
+            failed.update(errors)
+            files = [file for file in files if file not in errors]
+            if not files:
+                raise ValueError("None of the selected files could be read:\n" +
+                                 "\n".join(f"{file}: {error}" for file, error in failed.items()))
+            for name, todo in pending.items():
+                if todo is None:
+                    continue
+                for file in todo:
+                    if file in errors:
+                        progress.skip_file(file)
+                pending[name] = [file for file in todo if file not in errors]
+
+        unreadable = {}
+        if staging is not None and staging.enabled and (selection or SheetSelection()).sheet == 0:
+            # 暂存副本只保存第一个工作表；流式功能也从 Parquet 读取，每个版本只解析一次 XML
+            to_stage = [file for file in files if any(file in (todo or []) for todo in pending.values())]
+            if to_stage:
+                progress.start_stage("Staging workbooks")
+                unreadable.update(staging.stage_files(to_stage, workers=workers, progress=progress))
+            to_load = [file for file in to_load if file not in unreadable]
+        # 打不开的工作簿不参与后续阶段，一个坏文件不会中断整批处理；要加载的文件在解析时检查
+        loading = set(to_load)
+        for file in files:
+            if file not in loading and file not in unreadable:
+                try:
+                    sheet_names(file)
+                except Exception as e:
+                    unreadable[file] = str(e)
+        if unreadable:
+            skip_failed(unreadable)
+
+        analysis_path = save_paths.get("advanced_data_analysis")
+        analysis_rows = {}
+
+        def run_file_stages(todo, load):
+            """Run the per-file operations on the files todo maps them to, reading through load."""
+            if todo.get("clean"):
+                clean_files(todo["clean"], output_dir, load=load, progress=progress, staging=staging,
+                            selection=selection)
+            exports = {name: todo[name] for name in EXPORT_VARIANTS if todo.get(name)}
+            if exports:
+                # 格式化和模板导出共用一次读取，每个文件的所有输出在一遍写入中完成
+                export_variants(exports, output_dir, load=load, progress=progress,
+                                width_sample_rows=width_sample_rows, logo_path=logo_path)
+            if todo.get("rename_columns"):
+                rename_columns(todo["rename_columns"], column_mapping or {}, output_dir, load=load,
+                               progress=progress, notify=notify)
+            if todo.get("generate_summary"):
+                summarize_files(todo["generate_summary"], output_dir, load=load, progress=progress, notify=notify,
+                                staging=staging, selection=selection)
+            if analysis_path and todo.get("advanced_data_analysis"):
+                # 结果行先留着，所有文件统计完后一起写出
+                rows = analyze_files(todo["advanced_data_analysis"], None, load=load, progress=progress,
+                                     staging=staging, selection=selection)
+                analysis_rows.update(zip(todo["advanced_data_analysis"], rows))
+            if todo.get("data_analysis_report"):
+                report_files(todo["data_analysis_report"], output_dir, load=load, progress=progress, notify=notify,
+                             workers=workers)
+            for name in FILE_OUTPUTS:
+                if todo.get(name):
+                    record(name, todo[name])
+
+        # 逐文件功能按批运行：一批工作簿放得进缓存预算，批内跑完所有功能再解析下一批，
+        # 每个文件只解析一次，内存也不超过预算
+        loaded = set()
+        remaining = set(to_load)
+        if remaining:
+            progress.start_stage("Loading workbooks")
+        for batch, errors in cache.batches(to_load, workers=workers, progress=progress):
+            if errors:
+                skip_failed(errors)
+            loaded.update(batch)
+            remaining.difference_update(batch, errors)
+            in_batch = set(batch)
+            run_file_stages({name: [file for file in todo if file in in_batch]
+                             for name, todo in pending.items() if todo}, cache.get)
+            if remaining:
+                progress.start_stage("Loading workbooks")
+        if failed:
+            notify.showwarning("Warning", "These files could not be read and were skipped:\n" +
+                               "\n".join(f"{file}: {error}" for file, error in failed.items()))
+        # 不需要整表加载的文件按行或按块流式处理
+        run_file_stages({name: [file for file in pending[name] if file not in loaded]
+                         for name in ("clean", "generate_summary") if pending.get(name)}, None)
+        for name, message in FILE_MESSAGES.items():
+            if name in operations:
+                notify.showinfo("Success", message)
+        load = cache.get
+
+        if "merge" in operations and pending["merge"] is not None:
+            save_path = save_paths.get("merge")
+            if save_path:
+                # 逐行流式合并，不在内存中拼接整个 DataFrame
+                progress.start_stage("Merge Files")
+                stream_merge(files, save_path, progress=progress, staging=staging, selection=selection)
+                record("merge", files)
+                notify.showinfo("Success", f"Merged file saved as:\n{save_path}")
+
+        if "advanced_data_analysis" in operations and pending["advanced_data_analysis"] is not None:
+            if analysis_path:
+                # 只重新统计变化的文件，其余文件沿用清单中保存的结果行和本次按批统计的结果行
+                todo = set(pending["advanced_data_analysis"])
+                previous = {file: manifest.data(RunManifest.task_key("advanced_data_analysis", file))
+                            for file in files if file not in todo} if manifest is not None else {}
+                previous.update(analysis_rows)
+                rows = analyze_files(files, analysis_path, progress=progress, staging=staging,
+                                     previous=previous, selection=selection)
+                if manifest is not None:
+                    for file, row in zip(files, rows):
+                        manifest.record(RunManifest.task_key("advanced_data_analysis", file), [file],
+                                        options["advanced_data_analysis"], [], data=row)
+                record("advanced_data_analysis", files)
+                notify.showinfo("Success", f"Advanced analysis results saved as:\n{analysis_path}")
+
+        if "smart_multi_file_merge" in operations and pending["smart_multi_file_merge"] is not None:
+            save_path = save_paths.get("smart_multi_file_merge")
+            if save_path:
+                progress.start_stage("Smart Multi-File Merge")
+                stream_merge(files, save_path, progress=progress, staging=staging, selection=selection)
+                record("smart_multi_file_merge", files)
+                notify.showinfo("Success", f"Smart merged file saved as:\n{save_path}")
+
+        if "smart_cross_table_merge" in operations and pending["smart_cross_table_merge"] is not None:
+            save_path = save_paths.get("smart_cross_table_merge")
+            if save_path:
+                cross_table_merge(files, save_path, key=key, load=load, progress=progress, notify=notify)
+                record("smart_cross_table_merge", files)
+                notify.showinfo("Success", f"Smart cross-table merged file saved as:\n{save_path}")
+
+        if "authorization_management" in operations:
+            notify.showinfo("Info", "Authorization management is enabled. Please contact the administrator for team usage.")
+
+        for file, (before, after) in cache.compacted.items():
+            print(f"Compacted {file}: {before / 1048576:.1f} MB -> {after / 1048576:.1f} MB "
+                  f"({before - after:,} bytes saved)")
+        print(f"Workbook cache: {cache.stats()}")
+        status = "done"
+    except CancelledError:
+        status = "cancelled"
+        raise
+    finally:
+        cache.clear()
+        if run_log is not None:
+            progress.run_log = None
+            run_log.close(status)
+            if run_log.path:
+                print(f"Run log appended to {run_log.path}")
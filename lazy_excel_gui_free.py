@@ -1,14 +1,14 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox
-import pandas as pd
 import os
-import json
-from datetime import datetime
+from lazy_excel_common import parse_column_mapping
+from lazy_excel_quota import QuotaExceededError, QuotaStore
+from lazy_excel_worker import BackgroundRunner, ProgressPanel, close_splash_screen
 
 # Create main window
 root = tk.Tk()
 root.title("Lazy Excel Toolbox (Free Trial)")  # 修改标题
-root.geometry("600x500")  # 调整窗口高度
+root.geometry("600x620")  # 调整窗口高度
 
 # File list display box
 file_listbox = tk.Listbox(root, selectmode=tk.MULTIPLE, width=60, height=10)
@@ -68,19 +68,11 @@ rename_entry.insert(0, "OldColumn1:NewColumn1,OldColumn2:NewColumn2")  # Provide
 
 tk.Checkbutton(root, text="Generate Summary Template (Sum, Average, Count)", variable=features["generate_summary"]).pack(anchor="w", padx=20)
 
-# File processing limit logic
-def load_daily_limit():
-    """Load daily file processing limit from a JSON file."""
-    limit_file = "daily_limit.json"
-    if not os.path.exists(limit_file):
-        return {"date": str(datetime.now().date()), "processed_count": 0}
-    with open(limit_file, "r") as f:
-        return json.load(f)
+# File processing limit logic: 每日额度保存在用户数据目录，多个实例同时运行也不会丢失计数
+quota = QuotaStore()
 
-def save_daily_limit(data):
-    """Save daily file processing limit to a JSON file."""
-    with open("daily_limit.json", "w") as f:
-        json.dump(data, f)
+def quota_warning(remaining):
+    messagebox.showwarning("Warning", f"Free Trial version supports up to {quota.daily_limit} files per day. You can process {remaining} more files today.")
 
 # Function Implementation
 def process_files():
@@ -88,157 +80,138 @@ def process_files():
     if not files:
         messagebox.showwarning("Warning", "Please select Excel files first")
         return
-
-    # Load daily limit
-    daily_limit = load_daily_limit()
-    current_date = str(datetime.now().date())
-
-    # Reset count if the date has changed
-    if daily_limit["date"] != current_date:
-        daily_limit = {"date": current_date, "processed_count": 0}
-
-    # Check if daily limit is exceeded
-    if daily_limit["processed_count"] + len(files) > 10:
-        remaining = 10 - daily_limit["processed_count"]
-        messagebox.showwarning("Warning", f"Free Trial version supports up to 10 files per day. You can process {remaining} more files today.")
+    if runner.is_running():
         return
 
     try:
-        # Update processed count
-        daily_limit["processed_count"] += len(files)
-        save_daily_limit(daily_limit)
-
-        # Debug output
-        print(f"Daily processed count: {daily_limit['processed_count']}")
+        # Check if daily limit is exceeded; 额度在文件处理完成时才扣除
+        remaining = quota.remaining()
+        if len(files) > remaining:
+            quota_warning(remaining)
+            return
 
         # 添加调试信息以确认文件数量限制逻辑是否被触发
         print(f"Selected files: {len(files)}")  # 输出文件数量到终端
 
-        if features["merge"].get():
-            try:
-                merged_df = pd.DataFrame()
-                for file in files:
-                    if not os.path.exists(file):
-                        messagebox.showerror("Error", f"File not found:\n{file}")
-                        return
-                    try:
-                        df = pd.read_excel(file)
-                    except Exception as e:
-                        messagebox.showerror("Error", f"Failed to read file:\n{file}\nError: {str(e)}")
-                        return
-                    merged_df = pd.concat([merged_df, df], ignore_index=True, sort=False)
-
-                if features["clean"].get():
-                    merged_df.dropna(how='all', axis=0, inplace=True)
-                    merged_df.dropna(how='all', axis=1, inplace=True)
-
-                save_path = filedialog.asksaveasfilename(defaultextension=".xlsx",
-                                                         filetypes=[("Excel files", "*.xlsx")],
-                                                         title="Save Merged File As")
-                if not save_path:
-                    messagebox.showwarning("Warning", "No save path selected")
-                    return
+        selected = [name for name, var in features.items() if var.get()]
 
-                merged_df.to_excel(save_path, index=False)
-                messagebox.showinfo("Success", f"Merged file saved as:\n{save_path}")
-            except Exception as e:
-                messagebox.showerror("Error", f"Error during merge:\n{str(e)}")
-            return
+        # 后台线程不能弹出对话框，合并的保存路径需先在主线程中选择
+        merge_save_path = None
+        if "merge" in selected:
+            for file in files:
+                if not os.path.exists(file):
+                    messagebox.showerror("Error", f"File not found:\n{file}")
+                    return
 
-        if features["clean"].get():
-            try:
-                for file in files:
-                    if not os.path.exists(file):
-                        messagebox.showerror("Error", f"File not found:\n{file}")
-                        return
-                    try:
-                        df = pd.read_excel(file)
-                    except Exception as e:
-                        messagebox.showerror("Error", f"Failed to read file:\n{file}\nError: {str(e)}")
-                        return
-
-                    df.dropna(how='all', axis=0, inplace=True)
-                    df.dropna(how='all', axis=1, inplace=True)
-
-                    cleaned_path = os.path.splitext(file)[0] + "_cleaned.xlsx"
-                    df.to_excel(cleaned_path, index=False)
-
-                messagebox.showinfo("Success", "Data cleaning completed, files saved in original directories")
-            except Exception as e:
-                messagebox.showerror("Error", f"Error during cleaning:\n{str(e)}")
-            return
+            merge_save_path = filedialog.asksaveasfilename(defaultextension=".xlsx",
+                                                           filetypes=[("Excel files", "*.xlsx")],
+                                                           title="Save Merged File As")
+            if not merge_save_path:
+                messagebox.showwarning("Warning", "No save path selected")
+                return
 
-        if features["format_adjust"].get():
-            try:
-                for file in files:
-                    df = pd.read_excel(file)
-                    writer = pd.ExcelWriter(file.replace(".xlsx", "_formatted.xlsx"), engine='xlsxwriter')
-                    df.to_excel(writer, index=False, sheet_name='Sheet1')
-                    workbook = writer.book
-                    worksheet = writer.sheets['Sheet1']
-                    header_format = workbook.add_format({'bold': True, 'align': 'center', 'valign': 'vcenter'})
-                    for col_num, value in enumerate(df.columns.values):
-                        column_width = max(df[value].astype(str).map(len).max(), len(value)) + 2
-                        worksheet.write(0, col_num, value, header_format)
-                        worksheet.set_column(col_num, col_num, column_width)
-                    writer.save()
-                messagebox.showinfo("Success", "Format adjustment completed, files saved in original directories")
-            except Exception as e:
-                messagebox.showerror("Error", f"Error during format adjustment:\n{str(e)}")
-            return
+        mapping_text = rename_entry.get()
 
-        if features["rename_columns"].get():
-            try:
-                mapping_text = rename_entry.get()
-                if not mapping_text:
-                    messagebox.showwarning("Warning", "Please provide column mapping rules")
-                    return
-                column_mapping = dict(item.split(":") for item in mapping_text.split(","))
-                for file in files:
-                    df = pd.read_excel(file)
-                    missing_columns = [col for col in column_mapping.keys() if col not in df.columns]
-                    if missing_columns:
-                        messagebox.showwarning("Warning", f"The following columns are missing:\n{', '.join(missing_columns)}")
-                        continue
-                    df.rename(columns=column_mapping, inplace=True)
-                    renamed_path = file.replace(".xlsx", "_renamed.xlsx")
-                    df.to_excel(renamed_path, index=False)
-                messagebox.showinfo("Success", "Column renaming completed, files saved in original directories")
-            except Exception as e:
-                messagebox.showerror("Error", f"Error during column renaming:\n{str(e)}")
+        # 对话框关闭后再预留额度，期间其他实例可能已用掉剩余额度
+        try:
+            reservation = quota.reserve(len(files))
+        except QuotaExceededError as e:
+            quota_warning(e.remaining)
             return
 
-        if features["generate_summary"].get():
-            try:
-                for file in files:
-                    df = pd.read_excel(file)
-                    numeric_columns = df.select_dtypes(include=['number']).columns
-                    if numeric_columns.empty:
-                        messagebox.showwarning("Warning", f"No numeric columns found in file:\n{file}")
-                        continue
-                    summary = pd.DataFrame({
-                        "Column Name": df.columns,
-                        "Sum": [df[col].sum() if col in numeric_columns else None for col in df.columns],
-                        "Average": [df[col].mean() if col in numeric_columns else None for col in df.columns],
-                        "Count": [df[col].count() for col in df.columns]
-                    })
-                    summary_path = file.replace(".xlsx", "_summary.xlsx")
-                    summary.to_excel(summary_path, index=False)
-                messagebox.showinfo("Success", "Summary template generation completed, files saved in original directories")
-            except Exception as e:
-                messagebox.showerror("Error", f"Error during summary generation:\n{str(e)}")
-            return
+        def job(progress, notify):
+            # 每处理完一个文件扣除一次，取消或出错时未处理的文件不计入
+            progress.on_file_done = lambda path: reservation.charge()
+            with reservation:
+                return run_selected_feature(files, selected, merge_save_path, mapping_text, progress, notify)
 
-        # 清空文件列表和文本框
-        clear_file_list()
-        messagebox.showinfo("Success", "Files processed successfully. File list cleared.")
+        start_button.config(state="disabled")
+        runner.start(job, len(files), 1, on_processing_done)
     except Exception as e:
         messagebox.showerror("Error", f"Error during file processing:\n{str(e)}")
         # 保留文件列表
         print("File processing failed. File list retained.")
 
+def run_selected_feature(files, selected, merge_save_path, mapping_text, progress, notify):
+    """Run the first selected feature on the worker thread; returns True if none was selected."""
+    # pandas 等重量级依赖在第一次处理时才导入，窗口可以立即显示
+    from lazy_excel_engine import clean_files, format_files, rename_columns, stream_merge, summarize_files
+
+    if "merge" in selected:
+        try:
+            # 逐行流式合并；勾选清理时同时去掉全空的行和列
+            progress.start_stage("Merge Files")
+            clean = "clean" in selected
+            stream_merge(files, merge_save_path, drop_empty_rows=clean, drop_empty_columns=clean, progress=progress)
+            notify.showinfo("Success", f"Merged file saved as:\n{merge_save_path}")
+        except Exception as e:
+            notify.showerror("Error", f"Error during merge:\n{str(e)}")
+        return
+
+    if "clean" in selected:
+        try:
+            clean_files(files, progress=progress)
+            notify.showinfo("Success", "Data cleaning completed, files saved in original directories")
+        except Exception as e:
+            notify.showerror("Error", f"Error during cleaning:\n{str(e)}")
+        return
+
+    if "format_adjust" in selected:
+        try:
+            format_files(files, "format_adjust", progress=progress)
+            notify.showinfo("Success", "Format adjustment completed, files saved in original directories")
+        except Exception as e:
+            notify.showerror("Error", f"Error during format adjustment:\n{str(e)}")
+        return
+
+    if "rename_columns" in selected:
+        try:
+            if not mapping_text:
+                notify.showwarning("Warning", "Please provide column mapping rules")
+                return
+            rename_columns(files, parse_column_mapping(mapping_text), progress=progress, notify=notify)
+            notify.showinfo("Success", "Column renaming completed, files saved in original directories")
+        except Exception as e:
+            notify.showerror("Error", f"Error during column renaming:\n{str(e)}")
+        return
+
+    if "generate_summary" in selected:
+        try:
+            summarize_files(files, progress=progress, notify=notify)
+            notify.showinfo("Success", "Summary template generation completed, files saved in original directories")
+        except Exception as e:
+            notify.showerror("Error", f"Error during summary generation:\n{str(e)}")
+        return
+
+    return True
+
+def on_processing_done(status, result):
+    start_button.config(state="normal")
+    if status == "done":
+        if result:
+            # 清空文件列表和文本框
+            clear_file_list()
+            messagebox.showinfo("Success", "Files processed successfully. File list cleared.")
+    elif status == "cancelled":
+        messagebox.showinfo("Info", "Processing cancelled. File list retained.")
+    else:
+        messagebox.showerror("Error", f"Error during file processing:\n{str(result)}")
+        # 保留文件列表
+        print("File processing failed. File list retained.")
+
 # Adjust "Start Processing" button size
-tk.Button(root, text="Start Processing", command=process_files, bg="#4CAF50", fg="white", height=2, width=20).pack(pady=20)
+start_button = tk.Button(root, text="Start Processing", command=process_files, bg="#4CAF50", fg="white", height=2, width=20)
+start_button.pack(pady=20)
+
+# 进度条、吞吐量、剩余时间和取消按钮
+progress_panel = ProgressPanel(root, on_cancel=lambda: runner.cancel())
+progress_panel.pack(pady=5)
+runner = BackgroundRunner(root, progress_panel)
+
+close_splash_screen()
+# 启动耗时测试 (benchmarks/bench_startup.py)：窗口显示后立即退出
+if os.environ.get("LAZY_EXCEL_EXIT_AFTER_START"):
+    root.after_idle(root.destroy)
 
 # Main loop
 root.mainloop()
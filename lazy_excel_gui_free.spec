@@ -10,7 +10,7 @@ a = Analysis(
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
-    excludes=[],
+    excludes=['matplotlib', 'fpdf'],  # 免费版不生成图表报告，减小单文件 EXE 的解压体积
     noarchive=False,
     optimize=0,
 )
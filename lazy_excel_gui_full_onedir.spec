@@ -0,0 +1,54 @@
+# -*- mode: python ; coding: utf-8 -*-
+# Onedir build: files are not unpacked on every launch, so the window opens much faster
+# than the one-file EXE. A splash screen is shown while loading if splash.png exists.
+import os
+
+
+a = Analysis(
+    ['lazy_excel_gui_full.py'],
+    pathex=[],
+    binaries=[],
+    datas=[],
+    hiddenimports=[],
+    hookspath=[],
+    hooksconfig={},
+    runtime_hooks=[],
+    excludes=[],
+    noarchive=False,
+    optimize=0,
+)
+pyz = PYZ(a.pure)
+
+splash_exe, splash_binaries = [], []
+if os.path.exists('splash.png'):
+    splash = Splash('splash.png', binaries=a.binaries, datas=a.datas)
+    splash_exe, splash_binaries = [splash], [splash.binaries]
+
+exe = EXE(
+    pyz,
+    a.scripts,
+    *splash_exe,
+    [],
+    exclude_binaries=True,
+    name='lazy_excel_gui_full',
+    debug=False,
+    bootloader_ignore_signals=False,
+    strip=False,
+    upx=False,
+    console=False,
+    disable_windowed_traceback=False,
+    argv_emulation=False,
+    target_arch=None,
+    codesign_identity=None,
+    entitlements_file=None,
+)
+coll = COLLECT(
+    exe,
+    a.binaries,
+    a.datas,
+    *splash_binaries,
+    strip=False,
+    upx=False,
+    upx_exclude=[],
+    name='lazy_excel_gui_full',
+)
@@ -0,0 +1,497 @@
+import contextlib
+import hashlib
+import itertools
+import json
+import os
+import time
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:  # 未安装 pyarrow 时不使用 Parquet 暂存层
+    pq = None
+
+# 默认缓存预算 (MB)，可通过环境变量覆盖
+DEFAULT_CACHE_MB = int(os.environ.get("LAZY_EXCEL_CACHE_MB", "1024"))
+# 并行解析的进程数，默认使用全部 CPU 核心
+DEFAULT_WORKERS = int(os.environ.get("LAZY_EXCEL_WORKERS", "0")) or (os.cpu_count() or 1)
+# 文件数少于该值时串行解析，避免进程池启动开销
+MIN_PARALLEL_FILES = 4
+# Parquet 暂存目录；设置后同一工作簿只解析一次 XML，之后直接读取列式缓存
+DEFAULT_STAGING_DIR = os.environ.get("LAZY_EXCEL_STAGING_DIR") or None
+# 加载后是否压缩 dtype，设置 LAZY_EXCEL_COMPACT=0 关闭
+DEFAULT_COMPACT = os.environ.get("LAZY_EXCEL_COMPACT", "1") != "0"
+# 不同值占比不超过该值的字符串列转换为 category
+CATEGORY_RATIO = 0.5
+
+try:
+    # 与 pandas 3 默认的 str 类型一致，缺失值仍为 NaN
+    ARROW_STRING_DTYPE = pd.StringDtype("pyarrow", na_value=np.nan) if pq is not None else None
+except TypeError:  # pandas < 2.3 不支持 na_value
+    ARROW_STRING_DTYPE = None
+
+
+# 多个工作表叠加读取时记录来源工作表的列
+SHEET_COLUMN = "Sheet"
+
+
+class SheetSelection(namedtuple("SheetSelection", "sheet usecols rows", defaults=(0, None, None))):
+    """Which part of a workbook to read.
+
+    sheet is a sheet name or 0-based index, or None for every sheet stacked
+    into one frame with a leading SHEET_COLUMN. usecols is a list of column
+    names to keep (names missing from a sheet are ignored). rows is a
+    (start, stop) range of data rows below the header, 0-based with stop
+    exclusive; either end may be None. The default reads the whole first sheet.
+    Negative bounds raise ValueError: the read paths cannot count from the end
+    of a sheet alike without reading all of it.
+    """
+
+    def __new__(cls, sheet=0, usecols=None, rows=None):
+        if rows is not None and any(bound is not None and bound < 0 for bound in rows):
+            raise ValueError(f"Row range bounds must not be negative, got {rows}")
+        return super().__new__(cls, sheet, usecols, rows)
+
+    @property
+    def is_default(self):
+        return self.sheet == 0 and self.usecols is None and self.rows is None
+
+    def pandas_kwargs(self):
+        """Keyword arguments that push the selection down into pd.read_excel."""
+        kwargs = {"sheet_name": self.sheet}
+        if self.usecols is not None:
+            wanted = set(self.usecols)
+            kwargs["usecols"] = lambda name: name in wanted
+        if self.rows is not None:
+            start, stop = self.rows
+            start = start or 0
+            if start:
+                kwargs["skiprows"] = range(1, start + 1)
+            if stop is not None:
+                kwargs["nrows"] = max(stop - start, 0)
+        return kwargs
+
+    def project(self, df):
+        """Apply usecols and rows to a frame holding the whole sheet."""
+        if self.usecols is not None:
+            wanted = set(self.usecols)
+            df = df[[col for col in df.columns if col in wanted]]
+        if self.rows is not None:
+            df = df.iloc[slice(*self.rows)].reset_index(drop=True)
+        return df
+
+
+def read_workbook(path, selection=None, staging=None):
+    """Read the selected sheet(s), columns and rows of path as one DataFrame.
+
+    The first sheet comes from its Parquet copy in staging when there is one,
+    reading only the selected columns. Otherwise the selection is passed to
+    pd.read_excel so unselected columns are never built and reading stops after
+    the last selected row.
+    """
+    selection = selection or SheetSelection()
+    if staging is not None and staging.enabled and selection.sheet == 0:
+        return staging.read(path, columns=selection.usecols, rows=selection.rows)
+    df = pd.read_excel(path, **selection.pandas_kwargs())
+    if selection.sheet is None:
+        # 各工作表按出现顺序叠加，列取并集
+        df = pd.concat(df, names=[SHEET_COLUMN, None]).reset_index(level=0).reset_index(drop=True)
+    return df
+
+
+def frame_nbytes(df):
+    """Return the in-memory size of a DataFrame in bytes."""
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+def _smallest_integer_dtype(values):
+    low, high = values.min(), values.max()
+    for dtype in (np.int8, np.int16, np.int32):
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return dtype
+    return None
+
+
+def compact_frame(df, category_ratio=CATEGORY_RATIO):
+    """Return df with the smallest dtypes that hold its values exactly.
+
+    Integer columns are downcast to the narrowest integer type, float columns
+    to float32 when no value changes, string columns with few distinct values
+    become category and other string columns Arrow-backed strings (when
+    pyarrow is available). Other columns are left as they are.
+    """
+    dtypes = {}
+    for col in df.columns:
+        values = df[col]
+        dtype = values.dtype
+        if values.empty or not isinstance(dtype, (np.dtype, pd.StringDtype)):
+            continue
+        if pd.api.types.is_integer_dtype(dtype):
+            target = _smallest_integer_dtype(values)
+            if target is not None and np.dtype(target).itemsize < dtype.itemsize:
+                dtypes[col] = target
+        elif dtype == np.float64:
+            array = values.to_numpy()
+            if np.array_equal(array.astype(np.float32).astype(np.float64), array, equal_nan=True):
+                dtypes[col] = np.float32
+        elif dtype == object or isinstance(dtype, pd.StringDtype):
+            if dtype == object and pd.api.types.infer_dtype(values, skipna=True) != "string":
+                continue
+            if values.nunique() <= category_ratio * len(values):
+                dtypes[col] = "category"
+            elif ARROW_STRING_DTYPE is not None and dtype != ARROW_STRING_DTYPE:
+                dtypes[col] = ARROW_STRING_DTYPE
+    return df.astype(dtypes) if dtypes else df
+
+
+def file_digest(path, chunk_size=1024 * 1024):
+    """SHA-256 hex digest of the file at path, read in chunk_size blocks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class StagingCache:
+    """On-disk Parquet copies of input workbooks, so XML is parsed once per file version.
+
+    Entries are keyed by absolute path and validated by mtime and size; if
+    only the mtime changed, the content hash decides whether the Parquet copy
+    is still valid. Reads use column projection and memory mapping. Without
+    pyarrow, or for frames Parquet cannot store (e.g. mixed-type columns),
+    reads fall back to pd.read_excel.
+    """
+
+    def __init__(self, directory=DEFAULT_STAGING_DIR):
+        self.directory = directory
+
+    @property
+    def enabled(self):
+        return bool(self.directory) and pq is not None
+
+    def _entry(self, path):
+        name = hashlib.sha1(os.path.abspath(path).encode("utf-8")).hexdigest()
+        base = os.path.join(self.directory, name)
+        return base + ".parquet", base + ".json"
+
+    def staged_path(self, path):
+        """Return the Parquet copy of path if it is up to date, else None."""
+        if not self.enabled:
+            return None
+        data_path, meta_path = self._entry(path)
+        if not (os.path.exists(data_path) and os.path.exists(meta_path)):
+            return None
+        with open(meta_path, "r") as f:
+            meta = json.load(f)
+        stat = os.stat(path)
+        if meta["mtime_ns"] == stat.st_mtime_ns and meta["size"] == stat.st_size:
+            return data_path
+        if meta["size"] == stat.st_size and meta["sha256"] == file_digest(path):
+            # 文件只是被重新保存/触碰，内容未变
+            meta["mtime_ns"] = stat.st_mtime_ns
+            self._write_meta(meta_path, meta)
+            return data_path
+        return None
+
+    def stage(self, path, df):
+        """Write df as the Parquet copy of path; returns False if it cannot be stored."""
+        if not self.enabled:
+            return False
+        os.makedirs(self.directory, exist_ok=True)
+        data_path, meta_path = self._entry(path)
+        stat = os.stat(path)
+        tmp_path = data_path + f".{os.getpid()}.tmp"
+        try:
+            df.to_parquet(tmp_path, index=False)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return False
+        os.replace(tmp_path, data_path)
+        self._write_meta(meta_path, {"path": os.path.abspath(path), "mtime_ns": stat.st_mtime_ns,
+                                     "size": stat.st_size, "sha256": file_digest(path)})
+        return True
+
+    def stage_files(self, files, workers=None, progress=None):
+        """Write a Parquet copy of every file that has no up-to-date one, parsing them in parallel.
+
+        Streaming readers then read the copies instead of the XML. Returns a
+        dict of per-file errors. With progress (a lazy_excel_common.Progress)
+        every parsed file gets a record with its parse time, without counting
+        towards the stages' progress.
+        """
+        if not self.enabled:
+            return {}
+        missing = [path for path in dict.fromkeys(files) if self.staged_path(path) is None]
+        errors = {}
+        for path, error, times in _iter_parallel(partial(_stage_one, staging=self), missing, workers):
+            if progress is not None:
+                progress.start_file(path)
+                progress.add_phase("parse", *times)
+                progress.finish_file(path, units=0)
+            if error is not None:
+                errors[path] = error
+        return errors
+
+    def _write_meta(self, meta_path, meta):
+        tmp_path = meta_path + f".{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, meta_path)
+
+    def read(self, path, columns=None, rows=None):
+        """Return path as a DataFrame, from the Parquet copy when possible.
+
+        Only the given columns (names missing from the sheet are ignored), in
+        sheet order like pd.read_excel, and the (start, stop) range of rows are
+        returned.
+        """
+        staged = self.staged_path(path)
+        if staged is not None:
+            if columns is not None:
+                wanted = set(columns)
+                columns = [name for name in pq.read_schema(staged).names if name in wanted]
+            table = pq.read_table(staged, columns=columns, memory_map=True)
+            if rows is not None:
+                start, stop, _ = slice(*rows).indices(table.num_rows)
+                table = table.slice(start, max(stop - start, 0))
+            return table.to_pandas()
+        df = pd.read_excel(path)
+        self.stage(path, df)
+        return SheetSelection(usecols=columns, rows=rows).project(df)
+
+
+def _load(path, staging=None, selection=None, compact=False):
+    """Read path and optionally compact it; returns (DataFrame, (bytes before, bytes after) or None)."""
+    df = read_workbook(path, selection, staging)
+    if not compact:
+        return df, None
+    before = frame_nbytes(df)
+    df = compact_frame(df)
+    return df, (before, frame_nbytes(df))
+
+
+def _read_one(path, staging=None, selection=None, compact=False):
+    """Parse a single workbook, returning (DataFrame, None, sizes, times) or (None, error message, None, times).
+
+    times is the (wall, CPU) seconds spent, measured in the process that parsed it.
+    """
+    started = time.perf_counter(), time.process_time()
+    try:
+        df, sizes = _load(path, staging, selection, compact)
+        result = df, None, sizes
+    except Exception as e:
+        result = None, str(e), None
+    return result + ((time.perf_counter() - started[0], time.process_time() - started[1]),)
+
+
+def _stage_one(path, staging):
+    """Stage path unless its copy is up to date, returning (error message or None, times)."""
+    started = time.perf_counter(), time.process_time()
+    try:
+        if staging.staged_path(path) is None:
+            staging.stage(path, pd.read_excel(path))
+        error = None
+    except Exception as e:
+        error = str(e)
+    return error, (time.perf_counter() - started[0], time.process_time() - started[1])
+
+
+def _iter_parallel(function, files, workers=None, min_parallel=MIN_PARALLEL_FILES):
+    """Yield (path,) + function(path) for each file, in input order, from a process pool when worth it.
+
+    At most workers files are in flight, so results never pile up faster than
+    they are consumed. Closing the generator early stops the remaining calls.
+    """
+    files = list(files)
+    workers = min(workers or DEFAULT_WORKERS, len(files))
+    if workers <= 1 or len(files) < min_parallel:
+        for path in files:
+            yield (path,) + function(path)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        queued = iter(files)
+        pending = deque((path, executor.submit(function, path)) for path in itertools.islice(queued, workers))
+        try:
+            while pending:
+                path, future = pending.popleft()
+                result = future.result()
+                for next_path in itertools.islice(queued, 1):
+                    pending.append((next_path, executor.submit(function, next_path)))
+                yield (path,) + result
+        finally:
+            for _, future in pending:
+                future.cancel()
+
+
+def iter_workbooks(files, workers=None, min_parallel=MIN_PARALLEL_FILES, staging=None, selection=None,
+                   compact=False):
+    """Yield (path, DataFrame or None, error or None, sizes, times) for each file, in input order.
+
+    Files are parsed in a process pool when the batch is large enough, with at
+    most workers files in flight, so parsed frames never pile up faster than
+    they are consumed. Closing the generator early stops the remaining parses.
+    Arguments are as for load_workbooks.
+    """
+    read_one = partial(_read_one, staging=staging, selection=selection, compact=compact)
+    yield from _iter_parallel(read_one, files, workers, min_parallel)
+
+
+def load_workbooks(files, workers=None, min_parallel=MIN_PARALLEL_FILES, staging=None, selection=None,
+                   compact=False):
+    """Parse files, in parallel when the batch is large enough.
+
+    Returns (frames, errors, sizes): frames is in input order with None for
+    files that failed, errors maps each failed path to its message. One bad
+    file does not abort the rest of the batch. With a StagingCache, up-to-date
+    files are read from their Parquet copies and the others are staged after
+    parsing. Only the part of each workbook chosen by selection (a
+    SheetSelection) is read. With compact each frame goes through
+    compact_frame in the worker, and sizes maps its path to the
+    (bytes before, bytes after) pair.
+    """
+    results = list(iter_workbooks(files, workers, min_parallel, staging, selection, compact))
+    frames = [df for _, df, _, _, _ in results]
+    errors = {path: error for path, _, error, _, _ in results if error is not None}
+    sizes = {path: size for path, _, _, size, _ in results if size is not None}
+    return frames, errors, sizes
+
+
+class WorkbookCache:
+    """Per-run cache of parsed workbooks within a memory budget.
+
+    Every stage asks the cache for a file instead of calling pd.read_excel itself,
+    so a workbook is parsed once per run no matter how many features are ticked.
+    Stages receive the same DataFrame and must not modify it in place. Frames
+    are never evicted one by one: every stage walks the files in the same
+    order, and LRU would evict each frame just before the next stage needs
+    it. Instead batches() hands out the files in batches that fit in
+    max_bytes, so running the stages batch by batch parses each file once.
+    get() caches a frame only while it fits; files that do not are parsed
+    again by each stage that needs them (counted as uncached).
+    An optional StagingCache is used for every parse, and selection (a
+    SheetSelection) chooses the sheet, columns and rows read from each file.
+    With compact every frame is shrunk by compact_frame right after parsing;
+    compacted maps each path to its (bytes before, bytes after).
+    """
+
+    def __init__(self, max_bytes=DEFAULT_CACHE_MB * 1024 * 1024, staging=None, selection=None,
+                 compact=DEFAULT_COMPACT):
+        self.max_bytes = max_bytes
+        self.staging = staging
+        self.selection = selection
+        self.compact = compact
+        self.compacted = {}
+        self.hits = 0
+        self.misses = 0
+        self.uncached = 0
+        self.evicted_batches = 0
+        self._frames = {}
+        self._sizes = {}
+        self._used = 0
+
+    def get(self, path):
+        """Return the DataFrame for path, parsing it only on a cache miss."""
+        if path in self._frames:
+            self.hits += 1
+            return self._frames[path]
+        self.misses += 1
+        df, sizes = _load(path, self.staging, self.selection, self.compact)
+        if sizes is not None:
+            self.compacted[path] = sizes
+        self._store(path, df)
+        return df
+
+    def preload(self, files, workers=None, progress=None):
+        """Parse files not yet cached with the parallel loader, until the budget is full.
+
+        This is the first of batches(); the files after it are left to get().
+        Returns a dict of per-file errors for the files parsed.
+        """
+        with contextlib.closing(self.batches(files, workers, progress)) as batches:
+            _, errors = next(batches, (None, {}))
+        return errors
+
+    def batches(self, files, workers=None, progress=None):
+        """Parse files with the parallel loader and yield them in batches that fit the budget.
+
+        Each batch is (paths, errors): the files whose frames are now cached and
+        the per-file errors of the files parsed with them. When the next frame
+        does not fit, the batch is yielded and its frames are dropped once the
+        caller asks for the next one, so every file is parsed once and at most
+        max_bytes of frames (plus the frames still in flight) are held. A
+        frame larger than the whole budget is a batch of its own. The last
+        batch stays cached. With progress (a lazy_excel_common.Progress) every
+        file gets a record with its parse time, without counting towards the
+        stages' progress.
+        """
+        files = list(dict.fromkeys(files))
+        paths = [path for path in files if path in self._frames]
+        errors = {}
+        missing = [path for path in files if path not in self._frames]
+        with contextlib.closing(iter_workbooks(missing, workers=workers, staging=self.staging,
+                                               selection=self.selection, compact=self.compact)) as results:
+            for path, df, error, sizes, times in results:
+                if progress is not None:
+                    progress.start_file(path)
+                    progress.add_phase("parse", *times)
+                    progress.finish_file(path, units=0)
+                if error is not None:
+                    errors[path] = error
+                    continue
+                self.misses += 1
+                if sizes is not None:
+                    self.compacted[path] = sizes
+                size = frame_nbytes(df)
+                if self._frames and self._used + size > self.max_bytes:
+                    yield paths, errors
+                    paths, errors = [], {}
+                    self.clear()
+                    self.evicted_batches += 1
+                self._add(path, df, size)
+                paths.append(path)
+        if paths or errors:
+            yield paths, errors
+
+    def _store(self, path, df):
+        """Cache df if it fits in the remaining budget; returns whether it was cached."""
+        size = frame_nbytes(df)
+        if self._used + size > self.max_bytes:
+            self.uncached += 1
+            return False
+        self._add(path, df, size)
+        return True
+
+    def _add(self, path, df, size):
+        self._frames[path] = df
+        self._sizes[path] = size
+        self._used += size
+
+    def clear(self):
+        self._frames.clear()
+        self._sizes.clear()
+        self._used = 0
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "uncached": self.uncached,
+            "evicted_batches": self.evicted_batches,
+            "cached_files": len(self._frames),
+            "cached_bytes": self._used,
+            "bytes_saved": sum(before - after for before, after in self.compacted.values()),
+        }
+
+    def __contains__(self, path):
+        return path in self._frames
+
+    def __len__(self):
+        return len(self._frames)
@@ -0,0 +1,101 @@
+import json
+import os
+
+from lazy_excel_io import file_digest
+
+# 增量模式的清单文件；设置后未变化的输入会被跳过
+DEFAULT_MANIFEST_PATH = os.environ.get("LAZY_EXCEL_MANIFEST") or None
+# --incremental 时清单在输出目录中的文件名
+MANIFEST_NAME = ".lazy_excel_manifest.json"
+MANIFEST_VERSION = 1
+
+
+def _normalize(value):
+    # 与 JSON 往返后的结果一致，才能和清单中保存的选项直接比较
+    return json.loads(json.dumps(value))
+
+
+class RunManifest:
+    """Record of finished work, used to skip tasks whose inputs and options are unchanged.
+
+    A task is one operation on one target (an input file for per-file
+    operations, the save path for single-output ones). For each task the
+    manifest stores the sha256 of every input, the options it ran with and
+    the mtime of every output. The task is current when all of them still
+    match; inputs whose mtime and size are unchanged are not re-hashed. A
+    task may also keep a small JSON payload (e.g. one analysis row) that is
+    reused instead of re-reading its input.
+    """
+
+    def __init__(self, path=DEFAULT_MANIFEST_PATH):
+        self.path = path
+        self._digests = {}
+        self._inputs = {}
+        self._tasks = {}
+        if path and os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                data = {}
+            if data.get("version") == MANIFEST_VERSION:
+                self._inputs = data.get("inputs", {})
+                self._tasks = data.get("tasks", {})
+
+    def digest(self, path):
+        """Return the content hash of path, re-hashing only when its mtime or size changed."""
+        path = os.path.abspath(path)
+        if path not in self._digests:
+            stat = os.stat(path)
+            known = self._inputs.get(path)
+            if known and known["mtime_ns"] == stat.st_mtime_ns and known["size"] == stat.st_size:
+                digest = known["sha256"]
+            else:
+                digest = file_digest(path)
+                self._inputs[path] = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "sha256": digest}
+            self._digests[path] = digest
+        return self._digests[path]
+
+    @staticmethod
+    def task_key(operation, target):
+        return f"{operation}|{os.path.abspath(target)}"
+
+    def is_current(self, key, inputs, options, outputs):
+        task = self._tasks.get(key)
+        if task is None or task["options"] != _normalize(options):
+            return False
+        if task["inputs"] != [[os.path.abspath(path), self.digest(path)] for path in inputs]:
+            return False
+        recorded = task["outputs"]
+        if sorted(recorded) != sorted(os.path.abspath(path) for path in outputs):
+            return False
+        return all(os.path.exists(path) and os.stat(path).st_mtime_ns == mtime_ns
+                   for path, mtime_ns in recorded.items())
+
+    def data(self, key):
+        task = self._tasks.get(key)
+        return task.get("data") if task else None
+
+    def record(self, key, inputs, options, outputs, data=None):
+        """Remember a finished task; returns False (and forgets it) if an output is missing."""
+        outputs = [os.path.abspath(path) for path in outputs]
+        if not all(os.path.exists(path) for path in outputs):
+            self._tasks.pop(key, None)
+            return False
+        self._tasks[key] = {
+            "inputs": [[os.path.abspath(path), self.digest(path)] for path in inputs],
+            "options": _normalize(options),
+            "outputs": {path: os.stat(path).st_mtime_ns for path in outputs},
+            "data": _normalize(data),
+        }
+        return True
+
+    def save(self):
+        if not self.path:
+            return
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = self.path + f".{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": MANIFEST_VERSION, "inputs": self._inputs, "tasks": self._tasks}, f)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,183 @@
+# 免费版每日额度的存储，只依赖标准库，界面启动时导入不会加载 pandas
+import contextlib
+import datetime
+import os
+import sqlite3
+import sys
+import time
+
+# 免费版每天可以处理的文件数
+DAILY_FILE_LIMIT = 10
+# 额度数据库路径；未设置时放在用户数据目录中
+DEFAULT_QUOTA_PATH = os.environ.get("LAZY_EXCEL_QUOTA") or None
+QUOTA_NAME = "quota.sqlite3"
+# 累计处理多少个文件后写入一次数据库
+FLUSH_EVERY_FILES = 5
+# 预留超过这么久没有更新，视为所属实例已经退出，额度收回
+RESERVATION_TTL_S = 3600
+# 距上次续期超过这么久时，下一次扣除会提前写入并续期预留
+HEARTBEAT_S = RESERVATION_TTL_S / 4
+# 其他实例正在写入时最多等待的秒数
+BUSY_TIMEOUT_S = 10
+
+
+class QuotaExceededError(Exception):
+    """Raised by QuotaStore.reserve when fewer files than requested are left today."""
+
+    def __init__(self, remaining, limit):
+        super().__init__(f"Only {remaining} of {limit} files left today")
+        self.remaining = remaining
+        self.limit = limit
+
+
+def user_data_dir(app="LazyExcel"):
+    """Per-user directory for application data (%LOCALAPPDATA%, Application Support or XDG_DATA_HOME)."""
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or os.environ.get("APPDATA") or os.path.expanduser("~")
+    elif sys.platform == "darwin":
+        base = os.path.expanduser("~/Library/Application Support")
+    else:
+        base = os.environ.get("XDG_DATA_HOME") or os.path.expanduser("~/.local/share")
+    return os.path.join(base, app)
+
+
+def _today():
+    return str(datetime.date.today())
+
+
+class QuotaStore:
+    """Daily file quota of the free build, shared by every instance of one user.
+
+    Counts live in a small SQLite database in the user data directory, so
+    concurrent instances never lose or corrupt each other's updates. A run
+    first reserves its files in one short transaction; two instances cannot
+    both take the last files, and neither waits for the other's processing.
+    The reservation is then charged file by file as files complete, see
+    QuotaReservation. Reservations of instances that died without releasing
+    them expire after RESERVATION_TTL_S.
+    """
+
+    def __init__(self, path=DEFAULT_QUOTA_PATH, daily_limit=DAILY_FILE_LIMIT):
+        self.path = path or os.path.join(user_data_dir(), QUOTA_NAME)
+        self.daily_limit = daily_limit
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        """Yield a connection inside a write transaction, committed when the block ends."""
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT_S, isolation_level=None)
+        try:
+            connection.execute("CREATE TABLE IF NOT EXISTS usage (day TEXT PRIMARY KEY, used INTEGER NOT NULL)")
+            # AUTOINCREMENT: 过期删除的预留 id 不会分给新的预留，实例续期时不会改到别人的行
+            connection.execute("CREATE TABLE IF NOT EXISTS reservations (id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                               "day TEXT NOT NULL, files INTEGER NOT NULL, updated REAL NOT NULL)")
+            # IMMEDIATE 在开始时就取得写锁，读取和更新之间不会被其他实例插入
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                yield connection
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+            connection.execute("COMMIT")
+        finally:
+            connection.close()
+
+    def _available(self, connection, day):
+        connection.execute("DELETE FROM reservations WHERE day != ? OR updated < ?",
+                           (day, time.time() - RESERVATION_TTL_S))
+        used = connection.execute("SELECT used FROM usage WHERE day = ?", (day,)).fetchone()
+        reserved = connection.execute("SELECT COALESCE(SUM(files), 0) FROM reservations WHERE day = ?",
+                                      (day,)).fetchone()[0]
+        return max(self.daily_limit - (used[0] if used else 0) - reserved, 0)
+
+    def remaining(self):
+        """Files that can still be reserved today."""
+        with self._transaction() as connection:
+            return self._available(connection, _today())
+
+    def reserve(self, files):
+        """Reserve files files of today's quota; raises QuotaExceededError if not enough are left."""
+        day = _today()
+        with self._transaction() as connection:
+            available = self._available(connection, day)
+            if files > available:
+                raise QuotaExceededError(available, self.daily_limit)
+            cursor = connection.execute("INSERT INTO reservations (day, files, updated) VALUES (?, ?, ?)",
+                                        (day, files, time.time()))
+        return QuotaReservation(self, cursor.lastrowid, day, files)
+
+
+class QuotaReservation:
+    """Files reserved by one run, charged to the day's usage as they complete.
+
+    charge() only counts in memory; every FLUSH_EVERY_FILES files (and on
+    close) the count moves from the reservation to the used total in one
+    transaction, which also refreshes the reservation. A charge more than
+    HEARTBEAT_S after the last refresh flushes early, so a slow run is not
+    taken for a dead instance. If the reservation expired anyway, it is
+    restored for the files still to come as far as today's quota allows.
+    close() releases whatever was not charged, so a cancelled or failed run
+    only pays for the files it finished.
+    """
+
+    def __init__(self, store, reservation_id, day, files):
+        self.store = store
+        self.id = reservation_id
+        self.day = day
+        self.files = files
+        self.charged = 0
+        self._pending = 0
+        self._refreshed = time.time()
+
+    def charge(self, files=1):
+        self._pending = min(self._pending + files, self.files - self.charged)
+        if self._pending >= FLUSH_EVERY_FILES or time.time() - self._refreshed >= HEARTBEAT_S:
+            self.flush()
+
+    def _add_usage(self, connection):
+        if self._pending:
+            connection.execute("INSERT INTO usage (day, used) VALUES (?, ?) "
+                               "ON CONFLICT(day) DO UPDATE SET used = used + excluded.used", (self.day, self._pending))
+
+    def flush(self):
+        """Write the pending charges and refresh the reservation.
+
+        Raises QuotaExceededError, after writing the charges, if the
+        reservation had expired and the files still to come no longer fit in
+        today's quota; only the files that fit remain reserved.
+        """
+        now = time.time()
+        available = None
+        with self.store._transaction() as connection:
+            self._add_usage(connection)
+            cursor = connection.execute("UPDATE reservations SET files = files - ?, updated = ? WHERE id = ?",
+                                        (self._pending, now, self.id))
+            if cursor.rowcount == 0:
+                # 预留已被其他实例按过期收回，在今天剩余的额度内重新预留还没处理的文件
+                wanted = self.files - self.charged - self._pending
+                available = self.store._available(connection, self.day)
+                cursor = connection.execute("INSERT INTO reservations (day, files, updated) VALUES (?, ?, ?)",
+                                            (self.day, min(wanted, available), now))
+                self.id = cursor.lastrowid
+                if available >= wanted:
+                    available = None
+        self.charged += self._pending
+        self._pending = 0
+        self._refreshed = now
+        if available is not None:
+            self.files = self.charged + available
+            raise QuotaExceededError(available, self.store.daily_limit)
+
+    def close(self):
+        """Write the outstanding charges and release the rest of the reservation."""
+        with self.store._transaction() as connection:
+            self._add_usage(connection)
+            connection.execute("DELETE FROM reservations WHERE id = ?", (self.id,))
+        self.charged += self._pending
+        self._pending = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,121 @@
+import io
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from lazy_excel_io import DEFAULT_WORKERS
+
+# 行数不超过该值的列保留逐行柱状图，更多行时改画直方图
+MAX_BARS = 50
+# 直方图的分箱数
+HISTOGRAM_BINS = 50
+# 直方图上标出的分位数
+QUANTILES = ((0.05, "5%"), (0.5, "median"), (0.95, "95%"))
+# 图表数少于该值时在当前进程渲染，避免进程池启动开销
+MIN_PARALLEL_CHARTS = 16
+
+# 每个进程复用同一个 Figure，避免为每张图重新创建画布
+_figure = None
+
+
+def chart_data(name, series):
+    """Reduce a numeric column to the small, picklable spec that render_chart draws.
+
+    Columns of up to MAX_BARS rows keep one bar per row. Longer columns are
+    binned into a HISTOGRAM_BINS histogram with quantile markers, so the chart
+    cost no longer grows with the row count.
+    """
+    values = series.to_numpy(dtype="float64", na_value=np.nan)
+    if len(values) <= MAX_BARS:
+        return {"kind": "bar", "title": f"Analysis of {name}",
+                "labels": [str(label) for label in series.index], "values": values}
+    finite = values[np.isfinite(values)]
+    chart = {"kind": "hist", "title": f"Distribution of {name} ({len(values):,} rows)"}
+    if len(finite):
+        chart["counts"], chart["edges"] = np.histogram(finite, bins=HISTOGRAM_BINS)
+        chart["quantiles"] = np.quantile(finite, [q for q, _ in QUANTILES])
+    return chart
+
+
+def _get_figure():
+    global _figure
+    if _figure is None:
+        # 只用面向对象的 Agg 接口，不经过 pyplot 的全局状态
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+        _figure = Figure()
+        FigureCanvasAgg(_figure)
+    return _figure
+
+
+def render_chart(chart):
+    """Draw one chart spec and return it as PNG bytes."""
+    fig = _get_figure()
+    fig.clear()
+    ax = fig.add_subplot()
+    if chart["kind"] == "bar":
+        positions = np.arange(len(chart["values"]))
+        ax.bar(positions, chart["values"], width=0.5)
+        ax.set_xticks(positions, chart["labels"], rotation=90)
+    elif "counts" in chart:
+        ax.stairs(chart["counts"], chart["edges"], fill=True)
+        for value, (_, label) in zip(chart["quantiles"], QUANTILES):
+            ax.axvline(value, color="tab:red", linestyle="--", linewidth=1)
+            ax.annotate(label, (value, 1), xycoords=("data", "axes fraction"),
+                        rotation=90, va="top", ha="right", fontsize=8)
+        ax.set_ylabel("Rows")
+    ax.set_title(chart["title"])
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png")
+    return buffer.getvalue()
+
+
+def render_charts(charts):
+    return [render_chart(chart) for chart in charts]
+
+
+class ChartRenderer:
+    """Renders chart specs to PNG bytes, in a process pool for large batches.
+
+    The pool is started on the first batch that needs it and reused for every
+    later file until close(); each worker keeps its own Figure.
+    """
+
+    def __init__(self, workers=None, min_parallel=MIN_PARALLEL_CHARTS):
+        self.workers = workers or DEFAULT_WORKERS
+        self.min_parallel = min_parallel
+        self._executor = None
+
+    def render(self, charts):
+        if self.workers <= 1 or len(charts) < self.min_parallel:
+            return render_charts(charts)
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        # 每个进程一批，减少进程间传输和任务调度的次数
+        size = -(-len(charts) // self.workers)
+        batches = [charts[i:i + size] for i in range(0, len(charts), size)]
+        return [png for batch in self._executor.map(render_charts, batches) for png in batch]
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def write_report(images, save_path):
+    """Write the PDF report with one full-width chart per image, straight from memory."""
+    from fpdf import FPDF
+
+    pdf = FPDF()
+    pdf.add_page()
+    pdf.set_font("Arial", size=12)
+    pdf.cell(200, 10, text="Data Analysis Report", new_x="LMARGIN", new_y="NEXT", align='C')
+    for png in images:
+        pdf.image(io.BytesIO(png), x=10, y=None, w=180)
+    pdf.output(save_path)
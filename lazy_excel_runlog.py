@@ -0,0 +1,177 @@
+# 运行日志只依赖标准库，可以在界面和命令行中直接使用
+import contextlib
+import cProfile
+import datetime
+import json
+import os
+import pstats
+import sys
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:  # Windows 没有 resource 模块，不记录进程峰值内存
+    resource = None
+
+# JSONL 运行日志路径；未设置时不写日志
+DEFAULT_RUN_LOG = os.environ.get("LAZY_EXCEL_RUN_LOG") or None
+# 设置 LAZY_EXCEL_PROFILE=1 时用 cProfile 和 tracemalloc 采集
+DEFAULT_PROFILE = os.environ.get("LAZY_EXCEL_PROFILE", "0") not in ("", "0")
+# 开启采集但没有指定日志路径时使用的文件名
+RUN_LOG_NAME = "lazy_excel_runs.jsonl"
+# 运行记录中保留的最耗时函数个数
+PROFILE_TOP_FUNCTIONS = 25
+
+MB = 1024 * 1024
+
+
+def _peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 的 ru_maxrss 单位是 KB，macOS 是字节
+    return peak / MB if sys.platform == "darwin" else peak / 1024
+
+
+def _timer():
+    return time.perf_counter(), time.process_time()
+
+
+def _elapsed(started):
+    wall, cpu = _timer()
+    return round(wall - started[0], 6), round(cpu - started[1], 6)
+
+
+class RunLog:
+    """Per-stage and per-file timing of one run, appended to a JSONL file.
+
+    Progress feeds it stage and file boundaries; engine code wraps its read,
+    transform, write, chart and pdf steps in Progress.phase(). Every finished
+    file and stage becomes one record with wall and CPU time, rows, bytes read
+    and written, the time of each phase and the peak memory, followed by one
+    record for the whole run. With profile, the run is also captured with
+    cProfile (the calling thread; pool workers are not included) and
+    tracemalloc: the top functions go into the run record, the full profile is
+    saved next to the log as <log>.<run id>.prof, and file records get the
+    peak traced Python allocation.
+    """
+
+    def __init__(self, path=DEFAULT_RUN_LOG, profile=DEFAULT_PROFILE):
+        self.path = path or (RUN_LOG_NAME if profile else None)
+        self.profile = profile
+        self.run_id = f"{datetime.datetime.now():%Y%m%d-%H%M%S}-{os.getpid()}"
+        self.records = []
+        self._run = None
+        self._stage = None
+        self._file = None
+        self._profiler = None
+        self._started_tracemalloc = False
+
+    def start(self, operations, files):
+        self._run = {"type": "run", "run": self.run_id, "started": datetime.datetime.now().isoformat(),
+                     "operations": list(operations), "files": len(files), "timer": _timer()}
+        if self.profile:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracemalloc = True
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+
+    def start_stage(self, stage):
+        self._finish_stage()
+        self._stage = {"type": "stage", "run": self.run_id, "stage": stage, "files": 0, "rows": 0,
+                       "bytes_read": 0, "bytes_written": 0, "phases": {}, "timer": _timer()}
+
+    def start_file(self, path, rows_so_far):
+        self._file = {"type": "file", "run": self.run_id, "stage": self._stage["stage"] if self._stage else "",
+                      "file": path, "bytes_written": 0, "phases": {}, "timer": _timer(),
+                      "rows_at_start": rows_so_far}
+        if self.profile:
+            tracemalloc.reset_peak()
+
+    def finish_file(self, path, rows_so_far, bytes_read):
+        record = self._file
+        self._file = None
+        if record is None or record["file"] != path:
+            return
+        record["wall_s"], record["cpu_s"] = _elapsed(record.pop("timer"))
+        record["rows"] = rows_so_far - record.pop("rows_at_start")
+        record["bytes_read"] = bytes_read
+        record["peak_rss_mb"] = _peak_rss_mb()
+        if self.profile:
+            record["peak_traced_mb"] = tracemalloc.get_traced_memory()[1] / MB
+        self.records.append(record)
+        if self._stage is not None:
+            self._stage["files"] += 1
+            self._stage["rows"] += record["rows"]
+            self._stage["bytes_read"] += bytes_read
+            self._stage["bytes_written"] += record["bytes_written"]
+
+    @contextlib.contextmanager
+    def phase(self, name, output=None):
+        """Add the time spent in the block to phase name of the current file (or stage)."""
+        started = _timer()
+        try:
+            yield
+        finally:
+            self.add_phase(name, *_elapsed(started), output=output)
+
+    def add_phase(self, name, wall_s, cpu_s, output=None):
+        """Add time measured elsewhere (e.g. in a worker process) to phase name of the current file (or stage)."""
+        target = self._file or self._stage
+        if target is None:
+            return
+        phase = target["phases"].setdefault(name, {"wall_s": 0.0, "cpu_s": 0.0})
+        phase["wall_s"] += wall_s
+        phase["cpu_s"] += cpu_s
+        outputs = [output] if isinstance(output, str) else output or []
+        target["bytes_written"] += sum(os.path.getsize(path) for path in outputs if os.path.exists(path))
+
+    def _finish_stage(self):
+        if self._stage is None:
+            return
+        record = self._stage
+        self._stage = None
+        record["wall_s"], record["cpu_s"] = _elapsed(record.pop("timer"))
+        record["peak_rss_mb"] = _peak_rss_mb()
+        self.records.append(record)
+
+    def close(self, status="done"):
+        """Finish the run record, stop profiling and append every record to the log."""
+        self._finish_stage()
+        run = self._run or {"type": "run", "run": self.run_id, "timer": _timer()}
+        run["wall_s"], run["cpu_s"] = _elapsed(run.pop("timer"))
+        run["status"] = status
+        run["peak_rss_mb"] = _peak_rss_mb()
+        if self._profiler is not None:
+            self._profiler.disable()
+            run.update(self._profile_summary())
+            self._profiler = None
+        if self.profile:
+            run["peak_traced_mb"] = tracemalloc.get_traced_memory()[1] / MB
+            if self._started_tracemalloc:
+                tracemalloc.stop()
+        self.records.append(run)
+        if self.path:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                for record in self.records:
+                    f.write(json.dumps(record, default=str) + "\n")
+        return run
+
+    def _profile_summary(self):
+        summary = {}
+        if self.path:
+            profile_path = f"{self.path}.{self.run_id}.prof"
+            self._profiler.dump_stats(profile_path)
+            summary["profile"] = profile_path
+        stats = pstats.Stats(self._profiler)
+        top = []
+        for (filename, line, function), (_, calls, total, cumulative, _) in stats.stats.items():
+            top.append({"function": f"{os.path.basename(filename)}:{line}({function})", "calls": calls,
+                        "tottime_s": round(total, 6), "cumtime_s": round(cumulative, 6)})
+        top.sort(key=lambda entry: entry["cumtime_s"], reverse=True)
+        summary["top_functions"] = top[:PROFILE_TOP_FUNCTIONS]
+        return summary
@@ -0,0 +1,114 @@
+import numpy as np
+import pandas as pd
+
+
+# infer_dtype 结果中可以按数值统计的类型
+NUMERIC_KINDS = ("integer", "floating", "mixed-integer-float", "decimal")
+
+
+def _widened(values):
+    """Upcast compacted numeric columns (float32, int8, ...) so statistics match pd.read_excel's 64-bit dtypes."""
+    dtype = values.dtype
+    if isinstance(dtype, np.dtype) and dtype.itemsize < 8:
+        if dtype.kind == "f":
+            return values.astype("float64")
+        if dtype.kind in "iu":
+            return values.astype("int64")
+    return values
+
+
+class SheetStats:
+    """Single-pass column statistics over a sheet fed in row chunks.
+
+    Each add() updates count, sum, min and max per column and the number of
+    all-empty rows with vectorized pandas calls, so memory is bounded by the
+    chunk size. Numeric columns follow pd.read_excel's dtype inference on the
+    whole sheet: numbers, empty columns and booleans mixed with blanks or
+    numbers (read as float64) are numeric; a column with text, dates or only
+    booleans is not. Columns compacted to narrower dtypes (see
+    lazy_excel_io.compact_frame) are summed in 64 bits, so results do not
+    depend on compaction.
+    """
+
+    def __init__(self):
+        self.columns = None
+        self.rows = 0
+        self.empty_rows = 0
+        self.count = None
+        self.sum = None
+        self.min = None
+        self.max = None
+        self._not_numeric = set()
+        self._has_bool = set()
+        self._has_number = set()
+
+    def add(self, chunk):
+        if self.columns is None:
+            self.columns = list(chunk.columns)
+            self.count = pd.Series(0, index=self.columns, dtype="int64")
+            self.sum = pd.Series(dtype="float64")
+            self.min = pd.Series(dtype="float64")
+            self.max = pd.Series(dtype="float64")
+        self.rows += len(chunk)
+        self.empty_rows += int(chunk.isnull().all(axis=1).sum())
+        counts = chunk.count()
+        self.count = self.count.add(counts, fill_value=0).astype("int64")
+
+        numeric = {}
+        for col in chunk.columns:
+            if col in self._not_numeric or counts[col] == 0:
+                continue
+            values = chunk[col]
+            kind = pd.api.types.infer_dtype(values, skipna=True)
+            if kind in NUMERIC_KINDS:
+                self._has_number.add(col)
+                numeric[col] = _widened(pd.to_numeric(values))
+            elif kind == "boolean":
+                self._has_bool.add(col)
+                numeric[col] = values.astype("float64")
+            else:
+                self._not_numeric.add(col)
+        if numeric:
+            numeric = pd.DataFrame(numeric)
+            self.sum = self.sum.add(numeric.sum(), fill_value=0)
+            self.min = pd.concat([self.min, numeric.min()], axis=1).min(axis=1)
+            self.max = pd.concat([self.max, numeric.max()], axis=1).max(axis=1)
+
+    @property
+    def numeric_columns(self):
+        # 完全为空的列在 pd.read_excel 中是 float64，同样算作数值列；
+        # 只有布尔值且没有空值的列会被读成 bool，不算数值列
+        return [col for col in self.columns or []
+                if col not in self._not_numeric
+                and not (col in self._has_bool and col not in self._has_number and self.count[col] == self.rows)]
+
+    @property
+    def empty_columns(self):
+        return int((self.count == 0).sum()) if self.count is not None else 0
+
+    def total(self, col):
+        return self.sum.get(col, 0)
+
+    def mean(self, col):
+        return self.total(col) / self.count[col] if self.count[col] else float("nan")
+
+    def summary_table(self):
+        """Column Name / Sum / Average / Count table written by generate_summary."""
+        numeric_columns = set(self.numeric_columns)
+        return pd.DataFrame({
+            "Column Name": self.columns,
+            "Sum": [self.total(col) if col in numeric_columns else None for col in self.columns],
+            "Average": [self.mean(col) if col in numeric_columns else None for col in self.columns],
+            "Count": [int(self.count[col]) for col in self.columns]
+        })
+
+    def analysis_row(self, file):
+        """One row of the advanced_data_analysis table."""
+        return {
+            "File": file,
+            "Row Count": self.rows,
+            "Column Count": len(self.columns or []),
+            "Numeric Columns": len(self.numeric_columns),
+            "Empty Rows": self.empty_rows,
+            "Empty Columns": self.empty_columns
+        }
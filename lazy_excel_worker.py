@@ -0,0 +1,156 @@
+import os
+import queue
+import threading
+import tkinter as tk
+from tkinter import messagebox, ttk
+
+from lazy_excel_common import CancelledError, Progress
+
+# 界面轮询后台队列的间隔 (毫秒)
+POLL_MS = 100
+
+
+def _format_seconds(seconds):
+    if seconds is None:
+        return "--:--"
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes:02d}:{seconds:02d}"
+
+
+def close_splash_screen():
+    """Close the PyInstaller splash screen of the onedir build, if there is one."""
+    try:
+        import pyi_splash
+    except ImportError:
+        return
+    pyi_splash.close()
+
+
+class Notifier:
+    """Stand-in for tkinter.messagebox on the worker thread.
+
+    Messages are queued and shown by the Tk main loop, so the worker never
+    touches a widget and never blocks waiting for the user to click OK.
+    """
+
+    def __init__(self, message_queue):
+        self._queue = message_queue
+
+    def showinfo(self, title, message):
+        self._queue.put(("message", messagebox.showinfo, title, message))
+
+    def showwarning(self, title, message):
+        self._queue.put(("message", messagebox.showwarning, title, message))
+
+    def showerror(self, title, message):
+        self._queue.put(("message", messagebox.showerror, title, message))
+
+
+class ProgressPanel(tk.Frame):
+    """Progress bar with stage/file, throughput and ETA labels and a Cancel button."""
+
+    def __init__(self, master, on_cancel):
+        super().__init__(master)
+        self.bar = ttk.Progressbar(self, orient="horizontal", length=500, mode="determinate", maximum=1.0)
+        self.bar.pack(pady=2)
+        self.status_label = tk.Label(self, text="Idle", anchor="w", width=70)
+        self.status_label.pack()
+        self.stats_label = tk.Label(self, text="", anchor="w", width=70)
+        self.stats_label.pack()
+        self.cancel_button = tk.Button(self, text="Cancel", command=on_cancel, state="disabled")
+        self.cancel_button.pack(pady=2)
+
+    def set_running(self, running):
+        self.cancel_button.config(state="normal" if running else "disabled")
+        if running:
+            self.bar["value"] = 0
+            self.status_label.config(text="Starting...")
+            self.stats_label.config(text="")
+
+    def show(self, snapshot):
+        self.bar["value"] = snapshot["fraction"]
+        name = os.path.basename(snapshot["file"]) if snapshot["file"] else ""
+        self.status_label.config(text=f"{snapshot['stage']}  {name}  ({snapshot['fraction']:.0%})")
+        self.stats_label.config(text=f"{snapshot['rows_per_s']:,.0f} rows/s   "
+                                     f"{snapshot['mb_per_s']:.2f} MB/s   "
+                                     f"Elapsed {_format_seconds(snapshot['elapsed'])}   "
+                                     f"ETA {_format_seconds(snapshot['eta'])}")
+
+    def set_status(self, text):
+        self.status_label.config(text=text)
+
+
+class BackgroundRunner:
+    """Runs a processing job on a worker thread and relays its events to Tk.
+
+    The job is called as job(progress, notify) where progress is a
+    lazy_excel_engine.Progress and notify a Notifier. The main loop polls the
+    queue with root.after; on_done(status, result) is called on the Tk thread
+    with status "done" (result is the job's return value), "cancelled" or
+    "error" (result is the exception).
+    """
+
+    def __init__(self, root, panel):
+        self.root = root
+        self.panel = panel
+        self._queue = queue.Queue()
+        self._cancel_event = threading.Event()
+        self._thread = None
+        self._on_done = None
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, job, total_files, total_stages, on_done):
+        self._cancel_event.clear()
+        self._on_done = on_done
+        progress = Progress(total_files, total_stages,
+                            callback=lambda snapshot: self._queue.put(("progress", snapshot)),
+                            cancel_event=self._cancel_event)
+        notify = Notifier(self._queue)
+
+        def run():
+            try:
+                result = job(progress, notify)
+                self._queue.put(("finished", "done", result))
+            except CancelledError:
+                self._queue.put(("finished", "cancelled", None))
+            except Exception as e:
+                self._queue.put(("finished", "error", e))
+
+        self.panel.set_running(True)
+        self._thread = threading.Thread(target=run, daemon=True)
+        self._thread.start()
+        self.root.after(POLL_MS, self._poll)
+
+    def cancel(self):
+        if self.is_running():
+            self._cancel_event.set()
+            self.panel.set_status("Cancelling after the current chunk...")
+
+    def _poll(self):
+        latest = None
+        finished = None
+        while True:
+            try:
+                event = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if event[0] == "progress":
+                # 只显示最新的进度，避免界面被刷屏
+                latest = event[1]
+            elif event[0] == "message":
+                _, show, title, message = event
+                show(title, message)
+            else:
+                finished = event
+        if latest is not None:
+            self.panel.show(latest)
+        if finished is None:
+            self.root.after(POLL_MS, self._poll)
+            return
+        _, status, result = finished
+        self.panel.set_running(False)
+        self.panel.set_status({"done": "Done", "cancelled": "Cancelled", "error": "Failed"}[status])
+        self._on_done(status, result)
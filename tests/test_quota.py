@@ -0,0 +1,85 @@
+import sqlite3
+
+import pytest
+
+import lazy_excel_quota
+from lazy_excel_quota import QuotaExceededError, QuotaStore
+
+
+def _row(store, sql, *args):
+    connection = sqlite3.connect(store.path)
+    try:
+        return connection.execute(sql, args).fetchone()
+    finally:
+        connection.close()
+
+
+def _used(store):
+    row = _row(store, "SELECT used FROM usage")
+    return row[0] if row else 0
+
+
+def _expire(store):
+    connection = sqlite3.connect(store.path)
+    with connection:
+        connection.execute("UPDATE reservations SET updated = 0")
+    connection.close()
+
+
+def test_charges_are_written_in_batches(tmp_path):
+    store = QuotaStore(str(tmp_path / "quota.sqlite3"))
+    reservation = store.reserve(8)
+    updated = _row(store, "SELECT updated FROM reservations")[0]
+    for _ in range(lazy_excel_quota.FLUSH_EVERY_FILES - 1):
+        reservation.charge()
+    assert _used(store) == 0
+    assert _row(store, "SELECT updated FROM reservations")[0] == updated
+    reservation.charge()
+    assert _used(store) == lazy_excel_quota.FLUSH_EVERY_FILES
+    reservation.close()
+    assert store.remaining() == 10 - lazy_excel_quota.FLUSH_EVERY_FILES
+
+
+def test_old_reservation_is_refreshed_on_charge(tmp_path, monkeypatch):
+    store = QuotaStore(str(tmp_path / "quota.sqlite3"))
+    reservation = store.reserve(8)
+    monkeypatch.setattr(lazy_excel_quota, "HEARTBEAT_S", 0)
+    connection = sqlite3.connect(store.path)
+    with connection:
+        connection.execute("UPDATE reservations SET updated = updated - 60")
+    connection.close()
+    old = _row(store, "SELECT updated FROM reservations")[0]
+    reservation.charge()
+    assert _row(store, "SELECT updated FROM reservations")[0] > old
+    assert _used(store) == 1
+    reservation.close()
+
+
+def test_expired_reservation_is_restored(tmp_path):
+    store = QuotaStore(str(tmp_path / "quota.sqlite3"))
+    reservation = store.reserve(4)
+    _expire(store)
+    assert store.remaining() == 10
+    reservation.charge()
+    reservation.flush()
+    assert _used(store) == 1
+    assert store.remaining() == 6
+    reservation.close()
+    assert store.remaining() == 9
+
+
+def test_restore_stays_within_daily_limit(tmp_path):
+    store = QuotaStore(str(tmp_path / "quota.sqlite3"))
+    reservation = store.reserve(4)
+    _expire(store)
+    other = store.reserve(8)
+    reservation.charge()
+    with pytest.raises(QuotaExceededError) as error:
+        reservation.flush()
+    assert error.value.remaining == 1
+    assert _used(store) == 1
+    assert store.remaining() == 0
+    reservation.close()
+    other.close()
+    assert _used(store) == 1
+    assert store.remaining() == 9
@@ -0,0 +1,91 @@
+import numpy as np
+import pandas as pd
+
+from lazy_excel_io import compact_frame
+from lazy_excel_stats import SheetStats
+
+
+def _stats(df, chunk_rows=None):
+    stats = SheetStats()
+    chunk_rows = chunk_rows or max(len(df), 1)
+    for start in range(0, len(df), chunk_rows):
+        stats.add(df.iloc[start:start + chunk_rows])
+    return stats
+
+
+def _sample_frame(rows=200000):
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        "amount": np.round(rng.uniform(0, 1000, rows), 0) + 0.5,
+        "quantity": rng.integers(0, 100, rows),
+        "region": rng.choice(["North", "South"], rows),
+    })
+
+
+def test_summary_is_unchanged_by_compaction():
+    df = _sample_frame()
+    compacted = compact_frame(df)
+    assert compacted["amount"].dtype == np.float32
+    pd.testing.assert_frame_equal(_stats(compacted).summary_table(), _stats(df).summary_table(), check_exact=True)
+
+
+def test_summary_matches_pandas_on_full_frame():
+    df = _sample_frame()
+    table = _stats(df, chunk_rows=10000).summary_table().set_index("Column Name")
+    numeric = df.select_dtypes(include=["number"])
+    assert list(table["Sum"].dropna().index) == list(numeric.columns)
+    np.testing.assert_allclose(table["Sum"].dropna().astype(float), numeric.sum(), rtol=1e-12)
+    np.testing.assert_allclose(table["Average"].dropna().astype(float), numeric.mean(), rtol=1e-12)
+
+
+def _write_sheet(path, rows):
+    from openpyxl import Workbook
+    workbook = Workbook()
+    for row in rows:
+        workbook.active.append(row)
+    workbook.save(path)
+
+
+def test_streamed_stats_match_read_excel(tmp_path):
+    from lazy_excel_engine import sheet_stats
+
+    path = str(tmp_path / "text_numbers.xlsx")
+    rows = [["id", "text_amount", "amount", "flag", "mixed", "note"]]
+    for i in range(25):
+        rows.append([i, str(i % 4 + 0.5) if i % 5 else None, i * 1.5, True if i % 3 else None,
+                     "x" if i == 20 else str(i), "NA" if i % 2 else f"n{i}"])
+    _write_sheet(path, rows)
+
+    df = pd.read_excel(path)
+    numeric = df.select_dtypes(include=["number"])
+    for chunk_rows in (7, 10000):
+        stats = sheet_stats(path, chunk_rows=chunk_rows)
+        table = stats.summary_table().set_index("Column Name")
+        assert stats.numeric_columns == list(numeric.columns)
+        assert stats.analysis_row(path)["Numeric Columns"] == numeric.shape[1]
+        assert table["Count"].tolist() == df.count().tolist()
+        np.testing.assert_allclose(table.loc[numeric.columns, "Sum"].astype(float), numeric.sum())
+        np.testing.assert_allclose(table.loc[numeric.columns, "Average"].astype(float), numeric.mean())
+
+
+def test_streamed_stats_ignore_trailing_formatted_cells(tmp_path):
+    from openpyxl import Workbook
+    from openpyxl.styles import Font
+
+    from lazy_excel_engine import sheet_stats
+
+    path = str(tmp_path / "formatted.xlsx")
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(["year", "x", None])
+    for i in range(12):
+        sheet.append([2000 + i, i * 0.5])
+    sheet["C5"] = "late"
+    sheet["F20"].font = Font(bold=True)
+    workbook.save(path)
+
+    expected = sheet_stats(path, load=pd.read_excel)
+    for chunk_rows in (5, 10000):
+        stats = sheet_stats(path, chunk_rows=chunk_rows)
+        assert stats.analysis_row(path) == expected.analysis_row(path)
+        pd.testing.assert_frame_equal(stats.summary_table(), expected.summary_table())